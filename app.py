@@ -1,13 +1,24 @@
+from __future__ import annotations
+
 import io
 import os
+import math
 import re
+import json
+import time
 import zipfile
 import hashlib
-from dataclasses import dataclass
-from typing import List, Tuple, Dict, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, List, Tuple, Dict, Optional
 
 import streamlit as st
-from PIL import Image, ImageSequence
+
+# ✅ PIL은 로그인 이후 이미지 처리 함수 안에서만 import (콜드 스타트/로그인 화면 가볍게)
+if TYPE_CHECKING:
+    from PIL import Image
 
 from datetime import datetime, timedelta
 try:
@@ -35,11 +46,96 @@ DEFAULT_GAP = 300
 # ✅ 썸네일 (현재 안정버전 기준: 70)
 THUMB_W = 70
 
+# ✅ 배치(여러 상품) 생성 작업 풀 크기
+BATCH_WORKERS = max(1, min(4, os.cpu_count() or 2))
+
+# ✅ 업로드 선택 즉시 백그라운드 읽기(prefetch) 작업 수 (프로세스 공용, MISHARP_PREFETCH_WORKERS=0이면 끔)
+PREFETCH_WORKERS = int(os.environ.get("MISHARP_PREFETCH_WORKERS", "") or max(1, min(4, os.cpu_count() or 2)))
+
+# ✅ 로컬 에셋 저장소 (sha1 기준 원본/작업본/썸네일 + 프로젝트). 빈 값이면 사용 안 함
+ASSET_STORE_DIR = os.environ.get("MISHARP_ASSET_STORE", ".misharp_store")
+ASSET_STORE_MAX_BYTES = int(os.environ.get("MISHARP_ASSET_STORE_MAX_MB", "2048")) * 1024 * 1024
+# GC(용량 정리)는 매 저장마다가 아니라: 상한의 5%만큼 새로 쓰였거나 마지막 GC 후 10분이 지났을 때 백그라운드로
+ASSET_STORE_GC_EVERY_BYTES = max(1, ASSET_STORE_MAX_BYTES // 20)
+ASSET_STORE_GC_INTERVAL_S = 600
+# 애니메이션 원본은 세션 메모리 대신 저장소에 고정(pin): mtime을 미래로 두면 GC가 건너뜀 (세션 재실행마다 연장)
+ASSET_STORE_PIN_S = 6 * 3600
+
+# ✅ 흰 여백 자동 제거: 축소본(최대 256px)에서 경계만 찾고 원본은 한 번만 crop
+TRIM_PROXY_MAX = 256
+DEFAULT_TRIM_TOLERANCE = 12
+
+# ✅ 비슷한 사진(같은 컷의 JPG/PNG, 화질만 다른 재저장본) 판정: 64bit dHash 해밍 거리
+DHASH_PROXY = 64
+NEAR_DUP_MAX_DISTANCE = 6
+
 STATE_ITEMS = "img_items"
 STATE_SEEN = "seen_hashes"
 STATE_LAST_PREVIEW = "last_preview_jpg"
 STATE_LAST_ZIP = "last_bundle_zip"
 STATE_LAST_META = "last_meta"
+STATE_LAST_DELTA = "last_delta_zip"
+STATE_MANIFESTS = "build_manifests"
+STATE_PREFETCH = "upload_prefetch"
+STATE_LIST_EMPTIED = "list_emptied"
+STATE_PROJECT_MSG = "project_msg"
+STATE_PROJECT_OVERWRITE = "project_overwrite"  # 덮어쓰기 확인 대기 중인 프로젝트 이름
+STATE_BATCH_PRODUCTS = "batch_products"
+STATE_BATCH_ZIP = "batch_zip"
+STATE_BATCH_META = "batch_meta"
+
+# ✅ JPEG 인코딩 프로필 (출력별 선택)
+# - final: 긴 JPG 최종본 (기존 설정 그대로)
+# - draft: 빠른 미리보기용 (4:2:0, Huffman 최적화 생략)
+# - progressive: 웹 게시용 (점진 로딩, 4:2:0)
+# - intermediate: 번들 img_XX.jpg (Photoshop 입력용 → 화질 유지, 최적화 패스만 생략)
+JPEG_PROFILES: Dict[str, dict] = {
+    "final": {"quality": 95, "subsampling": 0, "optimize": True},
+    "draft": {"quality": 80, "subsampling": 2, "optimize": False},
+    "progressive": {"quality": 90, "subsampling": 2, "optimize": True, "progressive": True},
+    "intermediate": {"quality": 95, "subsampling": 0, "optimize": False},
+}
+JPEG_PROFILE_LABELS = {
+    "final": "최종(고화질)",
+    "draft": "초안(빠름)",
+    "progressive": "웹용(progressive)",
+    "intermediate": "중간본(PSD용)",
+}
+DEFAULT_LONG_PROFILE = "final"
+DEFAULT_PARTS_PROFILE = "intermediate"
+
+# ✅ 렌더 백엔드: "thread"(기본, 현재 프로세스) / "process"(render_pool.py 작업 프로세스 + 공유 메모리)
+RENDER_BACKEND = os.environ.get("MISHARP_RENDER_BACKEND", "thread")
+RENDER_PROCESSES = int(os.environ.get("MISHARP_RENDER_PROCESSES", "0")) or max(1, min(4, os.cpu_count() or 2))
+
+# ✅ 폭별 긴 JPG(1800/640 등) 생성 시 병렬 작업 수
+PYRAMID_WORKERS = max(1, min(4, os.cpu_count() or 2))
+EXTRA_WIDTH_OPTIONS = [1800, 640]
+
+# ✅ JPEG 최대 높이/폭 (libjpeg 한계) → 넘는 폭별 긴 JPG는 만들지 않고 경고
+JPEG_MAX_DIM = 65500
+
+# ✅ 긴 JPG 스트립 병렬 인코딩 (restart marker로 이어 붙인 baseline JPEG 1개)
+JPEG_STRIP_WORKERS = max(1, min(4, os.cpu_count() or 2))
+
+# ✅ 예상 JPG 크기: 이미지 영역 픽셀당 바이트 (직전 생성 결과가 있으면 그 실측값 사용)
+DEFAULT_EST_BYTES_PER_PX = 0.35
+
+# ✅ 웹용 HTML 출력: 이미지별 srcset 렌디션 폭
+HTML_SRCSET_WIDTHS = (480, 720, 900)
+# ✅ 움직이는 GIF/WEBP → 웹용 HTML에 애니메이션 WebP 렌디션 (선택)
+ANIMATED_WEBP_QUALITY = 80
+
+# ✅ 번들 매니페스트(멤버별 sha256) → 변경분(delta) ZIP
+MANIFEST_NAME = "manifest.json"
+ZIP_FIXED_DATE_TIME = (2020, 1, 1, 0, 0, 0)
+
+# ✅ 빌드 트레이스 로그 (이미지 내용은 저장하지 않음: 크기/포맷/바이트/모드/레이아웃/단계별 시간만)
+# - 기본 꺼짐: MISHARP_TRACE_LOG=build_trace.jsonl 처럼 경로를 줄 때만 기록
+# - 최대 크기를 넘으면 <경로>.1 로 한 번 돌리고 새로 시작 (최대 2개 파일)
+TRACE_LOG_PATH = os.environ.get("MISHARP_TRACE_LOG", "")
+TRACE_LOG_MAX_BYTES = int(float(os.environ.get("MISHARP_TRACE_LOG_MAX_MB", "50")) * 1024 * 1024)
+TRACE_VERSION = 1
 
 # auth states
 STATE_AUTH_OK = "auth_ok"
@@ -60,14 +156,15 @@ LOGO_PATH = "logo.png"
 # =========================================================
 # UI STYLE (designer-friendly)
 # =========================================================
-def inject_style(auth_ok: bool):
+@st.cache_resource(show_spinner=False)
+def _style_css(auth_ok: bool) -> str:
     """
     - 로그인 전: 브랜드 그린 배경 + 심플 카드 + 로고
     - 로그인 후: 폰트/간격/버튼 정리 + 사이드바 폭 얇게
+    (문자열은 프로세스당 1회만 생성)
     """
     if not auth_ok:
-        st.markdown(
-            f"""
+        return f"""
 <style>
 html, body, [class*="css"] {{
   font-family: ui-sans-serif, system-ui, -apple-system, Segoe UI, Roboto, "Noto Sans KR",
@@ -134,12 +231,8 @@ html, body, [class*="css"] {{
 /* 사이드바 숨김(로그인 전) */
 section[data-testid="stSidebar"] {{ display: none; }}
 </style>
-            """,
-            unsafe_allow_html=True,
-        )
-    else:
-        st.markdown(
             """
+    return """
 <style>
 html, body, [class*="css"] {
   font-family: ui-sans-serif, system-ui, -apple-system, Segoe UI, Roboto, "Noto Sans KR",
@@ -212,9 +305,30 @@ hr { opacity: 0.18; }
 /* tighten caption */
 [data-testid="stCaptionContainer"] { opacity: 0.80; }
 </style>
-            """,
-            unsafe_allow_html=True,
-        )
+            """
+
+
+def inject_style(auth_ok: bool):
+    st.markdown(_style_css(auth_ok), unsafe_allow_html=True)
+
+
+@st.cache_resource(show_spinner=False)
+def _logo_data_uri() -> str:
+    # logo.png는 프로세스당 1회만 읽음 (st.image 대신 data URI → PIL/numpy 로드 없이 표시)
+    if not os.path.exists(LOGO_PATH):
+        return ""
+    import base64
+
+    with open(LOGO_PATH, "rb") as f:
+        return "data:image/png;base64," + base64.b64encode(f.read()).decode("ascii")
+
+
+def render_logo(width: int) -> bool:
+    uri = _logo_data_uri()
+    if not uri:
+        return False
+    st.markdown(f'<img src="{uri}" width="{int(width)}" alt="MISHARP">', unsafe_allow_html=True)
+    return True
 
 
 def ms_section(title: str):
@@ -341,6 +455,25 @@ def _parse_entry_line(line: str):
     return None
 
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _parse_auth_entries(key: int, _entries: tuple, _legacy: tuple) -> list:
+    # 코드 목록 파싱만 캐시 (key = 목록 내용 해시 → Secrets가 바뀌면 바로 다시 파싱)
+    rows = []
+    for x in _entries:
+        if isinstance(x, str):
+            r = _parse_entry_line(x)
+            if r:
+                rows.append(r)
+
+    if not rows:
+        for x in _legacy:
+            if isinstance(x, str):
+                r = _parse_entry_line(x)
+                if r:
+                    rows.append(r)
+    return rows
+
+
 def _load_auth_secrets():
     """
     Secrets 예시:
@@ -354,6 +487,9 @@ def _load_auth_secrets():
 
     LOCK_MAX_FAILS = 5
     LOCK_MINUTES = 10
+
+    코드 목록 파싱은 내용 해시로 캐시 (재실행마다 다시 파싱하지 않음, 만료일 변경은 바로 반영)
+    REVOKED_LABELS 등 나머지는 매번 그대로 읽음 → 차단은 즉시 반영
     """
     try:
         enabled = _truthy(st.secrets.get("AUTH_ENABLED", False))
@@ -365,20 +501,9 @@ def _load_auth_secrets():
     except Exception:
         enabled, entries, legacy, revoked, lock_max_fails, lock_minutes = False, [], [], [], 5, 10
 
-    rows = []
-    if isinstance(entries, (list, tuple)):
-        for x in entries:
-            if isinstance(x, str):
-                r = _parse_entry_line(x)
-                if r:
-                    rows.append(r)
-
-    if (not rows) and isinstance(legacy, (list, tuple)):
-        for x in legacy:
-            if isinstance(x, str):
-                r = _parse_entry_line(x)
-                if r:
-                    rows.append(r)
+    entries_t = tuple(entries) if isinstance(entries, (list, tuple)) else ()
+    legacy_t = tuple(legacy) if isinstance(legacy, (list, tuple)) else ()
+    rows = _parse_auth_entries(hash((entries_t, legacy_t)), entries_t, legacy_t)
 
     revoked_set = set()
     if isinstance(revoked, (list, tuple)):
@@ -425,8 +550,7 @@ def require_login():
         ss = rem % 60
 
         st.markdown('<div class="ms-login">', unsafe_allow_html=True)
-        if os.path.exists(LOGO_PATH):
-            st.image(LOGO_PATH, width=170)
+        render_logo(170)
         st.markdown(f'<div class="ms-sub">PSD GENERATOR v3</div>', unsafe_allow_html=True)
         st.markdown('<h1>잠금 상태</h1>', unsafe_allow_html=True)
         st.markdown(f'<p>남은 시간: <b>{mm}분 {ss}초</b></p>', unsafe_allow_html=True)
@@ -439,9 +563,7 @@ def require_login():
 
     # 로그인 카드
     st.markdown('<div class="ms-login">', unsafe_allow_html=True)
-    if os.path.exists(LOGO_PATH):
-        st.image(LOGO_PATH, width=180)
-    else:
+    if not render_logo(180):
         st.markdown("<p>(logo.png 파일을 app.py와 같은 폴더에 넣어주세요)</p>", unsafe_allow_html=True)
 
     st.markdown(f'<div class="ms-sub">PSD GENERATOR v3</div>', unsafe_allow_html=True)
@@ -546,6 +668,14 @@ class ImgItem:
     pil: Image.Image
     ext: str
     sha1: str
+    trim_box: Optional[Tuple[int, int, int, int]] = None
+    capture_time: Optional[str] = None
+    jpeg_passthrough: bool = False
+    dhash: Optional[int] = None
+    near_dup_of: Optional[str] = None  # 먼저 추가된 비슷한 사진의 sha1
+    frames: int = 1  # 애니메이션 GIF/WEBP 프레임 수 (헤더 기준)
+    duration_ms: int = 0  # 1회 재생 길이
+    raw_size: int = 0  # 원본 바이트 수 (애니메이션 원본은 bytes_data를 비우고 저장소에 고정)
 
 
 def _sha1(data: bytes) -> str:
@@ -561,32 +691,315 @@ def _sanitize_filename(name: str) -> str:
     return name[:80] or "misharp_detailpage"
 
 
+def _natural_key(name: str):
+    # img_2 < img_10 (숫자 구간은 숫자로 비교)
+    parts = re.split(r"(\d+)", (name or "").lower())
+    return tuple((0, int(p), "") if p.isdigit() else (1, 0, p) for p in parts)
+
+
+def _read_capture_time(im: Image.Image) -> Optional[str]:
+    """
+    EXIF 촬영 시각("YYYY:MM:DD HH:MM:SS", 문자열 그대로 정렬 가능).
+    DateTimeOriginal(0x9003) → 없으면 DateTime(0x0132). 헤더만 읽음.
+    """
+    try:
+        exif = im.getexif()
+    except Exception:
+        return None
+    if not exif:
+        return None
+    try:
+        v = exif.get_ifd(0x8769).get(0x9003)
+    except Exception:
+        v = None
+    v = v or exif.get(0x0132)
+    if not v:
+        return None
+    v = str(v).strip().strip("\x00")
+    return v or None
+
+
 def _is_image_filename(fn: str) -> bool:
     fn_l = fn.lower()
     return fn_l.endswith((".jpg", ".jpeg", ".png", ".gif", ".webp"))
 
 
 def _open_image_any(data: bytes) -> Image.Image:
+    from PIL import Image
+
     im = Image.open(io.BytesIO(data))
-    if getattr(im, "is_animated", False):
-        frame0 = next(ImageSequence.Iterator(im))
-        im = frame0.copy()
+    # 애니메이션 GIF/WEBP도 open 직후가 첫 프레임 → is_animated(다음 프레임 탐색) 없이 바로 디코드
     if im.mode not in ("RGB", "RGBA"):
         im = im.convert("RGB")
+    elif im.format in ("GIF", "WEBP"):
+        # 여러 프레임 디코더가 원본을 붙잡지 않게 첫 프레임만 복사
+        im = im.copy()
     return im
 
 
+def _anim_info(data: bytes) -> Tuple[int, int]:
+    """
+    애니메이션 GIF/WEBP → (프레임 수, 1회 재생 길이 ms). 정지 이미지/그 외 포맷은 (1, 0)
+    - 픽셀은 디코드하지 않고 블록/청크 헤더만 훑음 (GIF: 이미지 서술자 + 그래픽 제어 확장, WEBP: ANMF)
+    - 구조가 예상과 다르면 그때까지 센 값 (최소 1프레임)
+    """
+    frames = 0
+    duration = 0
+    n = len(data)
+    try:
+        if data[:6] in (b"GIF87a", b"GIF89a"):
+            i = 13 + (3 << ((data[10] & 7) + 1) if data[10] & 0x80 else 0)
+            while i < n:
+                b = data[i]
+                if b == 0x3B:
+                    break
+                if b == 0x21:
+                    if data[i + 1] == 0xF9 and data[i + 2] >= 4:
+                        duration += int.from_bytes(data[i + 4 : i + 6], "little") * 10
+                    i += 2
+                elif b == 0x2C:
+                    frames += 1
+                    flags = data[i + 9]
+                    i += 10 + (3 << ((flags & 7) + 1) if flags & 0x80 else 0) + 1
+                else:
+                    break
+                # 서브블록 건너뛰기 (길이 0 = 끝)
+                while i < n and data[i]:
+                    i += data[i] + 1
+                i += 1
+        elif data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            i = 12
+            while i + 8 <= n:
+                size = int.from_bytes(data[i + 4 : i + 8], "little")
+                if data[i : i + 4] == b"ANMF":
+                    frames += 1
+                    duration += int.from_bytes(data[i + 20 : i + 23], "little")
+                i += 8 + size + (size & 1)
+    except IndexError:
+        pass
+    if frames <= 1:
+        return 1, 0
+    return frames, duration
+
+
+def _is_passthrough_jpeg(im: Image.Image) -> bool:
+    """
+    재인코딩 없이 원본 바이트를 번들에 그대로 넣어도 되는지 판단 (추가 시점, 헤더 정보만 사용)
+    - 이미 캔버스 폭(900px)인 baseline(비 progressive) RGB JPEG
+    - 애니메이션/여백 제거/모드 변환된 경우는 제외 (호출 측에서 판단)
+    """
+    if getattr(im, "format", None) != "JPEG":
+        return False
+    if im.size[0] != CANVAS_WIDTH or im.mode != "RGB":
+        return False
+    if im.info.get("progressive") or im.info.get("progression"):
+        return False
+    return True
+
+
+# 통과(passthrough) 시 제거할 세그먼트: APP1(EXIF/XMP), APP2(ICC/MPF), APP3~APP13, APP15, COM
+# - APP2 ICC도 제거: 재인코딩 경로(긴 JPG, 나머지 img_XX.jpg)는 프로필 없이 저장 → 통과 파일만 색 변환되면 PSD 레이어끼리 색이 달라짐
+# - APP0 JFIF / APP14 Adobe(YCbCr/RGB 변환 여부)는 디코드에 필요하므로 유지
+_JPEG_STRIP_MARKERS = set(range(0xE1, 0xEE)) | {0xEF, 0xFE}
+
+
+def _strip_jpeg_metadata(data: bytes) -> bytes:
+    """
+    JPEG 스트림에서 메타데이터 세그먼트만 잘라냄 (엔트로피 데이터는 바이트 그대로 → 화질 손실 없음)
+    구조가 예상과 다르면 원본을 그대로 반환.
+    """
+    if data[:2] != b"\xff\xd8":
+        return data
+    out = bytearray(b"\xff\xd8")
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return data
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0xDA:
+            # EOI 뒤에 붙은 데이터(MPF 보조 이미지 등)는 버림 (엔트로피 데이터 안의 0xFF는 항상 0xFF00으로 채워져 있음)
+            eoi = data.find(b"\xff\xd9", i)
+            out += data[i:eoi + 2] if eoi >= 0 else data[i:]
+            return bytes(out)
+        seg_len = int.from_bytes(data[i + 2:i + 4], "big")
+        end = i + 2 + seg_len
+        if seg_len < 2 or end > n:
+            return data
+        if marker not in _JPEG_STRIP_MARKERS:
+            out += data[i:end]
+        i = end
+    return data
+
+
+def _find_trim_box(im: Image.Image, tolerance: int = DEFAULT_TRIM_TOLERANCE) -> Optional[Tuple[int, int, int, int]]:
+    """
+    흰색/거의 흰색 테두리를 뺀 콘텐츠 영역(box)을 원본 좌표로 반환.
+    - 분석은 축소본(최대 TRIM_PROXY_MAX px)에서만 → 6000px 원본도 수 ms
+    - 축소 오차만큼 바깥으로 1칸 넓혀서 콘텐츠가 잘리지 않게
+    - 잘라낼 게 없거나 전부 흰색이면 None
+    """
+    from PIL import Image, ImageChops
+
+    w, h = im.size
+    factor = max(1, math.ceil(max(w, h) / TRIM_PROXY_MAX))
+    proxy = im.reduce(factor) if factor > 1 else im
+    if proxy.mode == "RGBA":
+        bg = Image.new("RGBA", proxy.size, (255, 255, 255, 255))
+        proxy = Image.alpha_composite(bg, proxy)
+    proxy = proxy.convert("RGB")
+
+    white = Image.new("RGB", proxy.size, (255, 255, 255))
+    diff = ImageChops.difference(proxy, white).convert("L")
+    mask = diff.point(lambda v: 255 if v > tolerance else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return None
+
+    pw, ph = proxy.size
+    if bbox == (0, 0, pw, ph):
+        return None
+
+    sx = w / float(pw)
+    sy = h / float(ph)
+    left = max(0, int((bbox[0] - 1) * sx))
+    top = max(0, int((bbox[1] - 1) * sy))
+    right = min(w, math.ceil((bbox[2] + 1) * sx))
+    bottom = min(h, math.ceil((bbox[3] + 1) * sy))
+    if (left, top, right, bottom) == (0, 0, w, h) or right <= left or bottom <= top:
+        return None
+    return (left, top, right, bottom)
+
+
+def _dhash_bytes(raw: bytes) -> Optional[int]:
+    """
+    64bit dHash: 9×8 그레이 축소본에서 가로 이웃 밝기 비교.
+    - JPEG은 draft로 축소 디코드 → 원본 전체를 디코드하기 전에 수 ms
+    - 포맷/화질/해상도만 다른 같은 컷은 거리 0~수 비트
+    """
+    from PIL import Image
+
+    try:
+        im = Image.open(io.BytesIO(raw))
+        im.draft("L", (DHASH_PROXY, DHASH_PROXY))
+        if im.mode not in ("L", "RGB", "RGBA"):
+            im = im.convert("RGB")
+        factor = max(1, math.ceil(max(im.size) / (DHASH_PROXY * 4)))
+        if factor > 1:
+            im = im.reduce(factor)
+        px = im.convert("L").resize((9, 8), Image.Resampling.BOX).tobytes()
+    except Exception:
+        return None
+
+    v = 0
+    for r in range(0, 72, 9):
+        for c in range(r, r + 8):
+            v = (v << 1) | (px[c] > px[c + 1])
+    return v
+
+
+def _near_dup_of(h: Optional[int], items: List[ImgItem], max_distance: int = NEAR_DUP_MAX_DISTANCE) -> Optional[ImgItem]:
+    """
+    세션 목록 전체와의 해밍 거리를 한 번에 계산 (uint64 XOR + popcount 벡터 연산)
+    → 가장 가까운 항목이 max_distance 이하면 그 항목, 아니면 None
+    """
+    cands = [it for it in items if it.dhash is not None]
+    if h is None or not cands:
+        return None
+    import numpy as np  # streamlit 의존성으로 항상 설치됨
+
+    x = np.fromiter((it.dhash for it in cands), dtype=np.uint64, count=len(cands)) ^ np.uint64(h)
+    if hasattr(np, "bitwise_count"):
+        dist = np.bitwise_count(x)
+    else:
+        dist = np.unpackbits(x.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+    i = int(dist.argmin())
+    return cands[i] if int(dist[i]) <= max_distance else None
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _cached_trim_box(sha1: str, tolerance: int, _im: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+    # sha1+tolerance 기준 캐시 (같은 원본은 다시 계산하지 않음, _im은 해시 대상 제외)
+    return _find_trim_box(_im, tolerance)
+
+
+def _scaled_height(w: int, h: int, width: int = CANVAS_WIDTH) -> int:
+    # _fit_to_width_900 과 같은 반올림 (치수만으로 결과 높이 계산)
+    if w == width:
+        return h
+    return int(round(h * (width / float(w))))
+
+
 def _fit_to_width_900(im: Image.Image, width: int = CANVAS_WIDTH) -> Image.Image:
+    from PIL import Image
+
     w, h = im.size
     if w == width:
         return im.convert("RGB") if im.mode != "RGB" else im
-    scale = width / float(w)
-    new_h = int(round(h * scale))
+    new_h = _scaled_height(w, h, width)
     resized = im.resize((width, new_h), resample=Image.Resampling.LANCZOS)
     return resized.convert("RGB")
 
 
+def _fit_to_width_900_cached(it: ImgItem, cache: Optional[Dict[tuple, Image.Image]]) -> Image.Image:
+    """
+    900px 작업본: 메모리 캐시 → 디스크 저장소 → 새로 리사이즈(후 저장소에 기록) 순.
+    이미 900px인 원본은 리사이즈가 없으므로 저장소를 거치지 않음.
+    """
+    key = (it.sha1, it.trim_box)
+    if cache is not None and key in cache:
+        return cache[key]
+    needs_resize = it.pil.size[0] != CANVAS_WIDTH
+    im = _store_get_work(it) if needs_resize else None
+    if im is None:
+        im = _fit_to_width_900(it.pil)
+        if needs_resize:
+            _store_put_work(it, im)
+    if cache is not None:
+        cache[key] = im
+    return im
+
+
+def _resize_all(items: List[ImgItem], cache: Optional[Dict[tuple, Image.Image]], backend: str = "thread") -> List[Image.Image]:
+    """
+    목록 전체 900px 작업본. process 백엔드는 캐시/저장소에 없는 것만 모아 작업 프로세스에서 한 번에 리사이즈.
+    """
+    if backend != "process":
+        return [_fit_to_width_900_cached(it, cache) for it in items]
+
+    out: List[Optional[Image.Image]] = [None] * len(items)
+    todo: List[int] = []
+    for i, it in enumerate(items):
+        key = (it.sha1, it.trim_box)
+        if cache is not None and key in cache:
+            out[i] = cache[key]
+        elif it.pil.size[0] == CANVAS_WIDTH:
+            out[i] = _fit_to_width_900(it.pil)
+        else:
+            out[i] = _store_get_work(it)
+            if out[i] is None:
+                todo.append(i)
+
+    if todo:
+        import render_pool
+
+        sizes = [(CANVAS_WIDTH, _scaled_height(*items[i].pil.size)) for i in todo]
+        for i, im in zip(todo, render_pool.resize_many([items[i].pil for i in todo], sizes, RENDER_PROCESSES)):
+            _store_put_work(items[i], im)
+            out[i] = im
+
+    if cache is not None:
+        for it, im in zip(items, out):
+            cache[(it.sha1, it.trim_box)] = im
+    return out
+
+
 def _make_thumb(im: Image.Image, w: int = THUMB_W) -> bytes:
+    from PIL import Image
+
     thumb = im.copy()
     scale = w / float(thumb.size[0])
     th = max(1, int(round(thumb.size[1] * scale)))
@@ -608,11 +1021,15 @@ def _extract_zip_images(zip_bytes: bytes) -> List[Tuple[str, bytes]]:
     return out
 
 
-def _compose_long_jpg(resized_images: List[Image.Image], top_pad: int, bottom_pad: int, gap: int) -> Image.Image:
+def _compose_long_jpg(
+    resized_images: List[Image.Image], top_pad: int, bottom_pad: int, gap: int, width: int = CANVAS_WIDTH
+) -> Image.Image:
+    from PIL import Image
+
     heights = [im.size[1] for im in resized_images]
     total_h = top_pad + bottom_pad + sum(heights) + gap * (len(resized_images) - 1)
 
-    canvas = Image.new("RGB", (CANVAS_WIDTH, total_h), color=(255, 255, 255))
+    canvas = Image.new("RGB", (width, total_h), color=(255, 255, 255))
     y = top_pad
     for idx, im in enumerate(resized_images):
         canvas.paste(im, (0, y))
@@ -622,18 +1039,188 @@ def _compose_long_jpg(resized_images: List[Image.Image], top_pad: int, bottom_pa
     return canvas
 
 
-def _save_jpg_bytes(im: Image.Image) -> bytes:
+def _save_jpg_bytes(im: Image.Image, profile: str = "final") -> bytes:
+    opts = JPEG_PROFILES.get(profile) or JPEG_PROFILES["final"]
     out = io.BytesIO()
-    im.save(out, format="JPEG", quality=95, subsampling=0, optimize=True)
+    im.save(out, format="JPEG", **opts)
     return out.getvalue()
 
 
+def _compose_strip(
+    resized_images: List[Image.Image], top_pad: int, bottom_pad: int, gap: int, y0: int, y1: int, width: int = CANVAS_WIDTH
+) -> Image.Image:
+    """
+    긴 캔버스의 [y0, y1) 구간만 합성 (전체 캔버스를 만들지 않음)
+    - _compose_long_jpg와 같은 배치 → 잘라낸 것과 픽셀 동일
+    """
+    from PIL import Image
+
+    strip = Image.new("RGB", (width, y1 - y0), color=(255, 255, 255))
+    y = top_pad
+    for im in resized_images:
+        h = im.size[1]
+        if y < y1 and y + h > y0:
+            strip.paste(im, (0, y - y0))
+        y += h + gap
+        if y >= y1:
+            break
+    return strip
+
+
+def _jpeg_mcu_size(opts: dict) -> Tuple[int, int]:
+    # subsampling 0=4:4:4(8×8) / 1=4:2:2(16×8) / 2=4:2:0(16×16)
+    sub = opts.get("subsampling", 2)
+    return (8 if sub == 0 else 16), (16 if sub == 2 else 8)
+
+
+def _jpeg_entropy_span(data: bytes) -> Tuple[int, int]:
+    """
+    baseline JPEG → (SOS 세그먼트 시작, 엔트로피 데이터 시작). 끝은 항상 EOI(FFD9) 직전.
+    """
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            raise ValueError("JPEG 마커 위치 오류")
+        marker = data[i + 1]
+        seg_end = i + 2 + int.from_bytes(data[i + 2 : i + 4], "big")
+        if marker == 0xDA:
+            return i, seg_end
+        i = seg_end
+    raise ValueError("SOS 마커 없음")
+
+
+def _stitch_jpeg_strips(strips: List[bytes], total_h: int, restart_interval: int) -> bytes:
+    """
+    같은 설정으로 인코딩한 스트립 JPEG들 → baseline JPEG 1개
+    - 첫 스트립 헤더 사용: SOF0 높이를 전체 높이로, SOS 앞에 DRI(restart interval) 추가
+    - 스트립 경계 = restart 경계 (DC 예측 초기화, 바이트 정렬) → 스트립 사이에 RST0~7만 끼워 넣음
+    - 모든 스트립은 마지막을 빼고 정확히 restart_interval개의 MCU여야 함
+    """
+    out = bytearray()
+    for k, data in enumerate(strips):
+        sos, body = _jpeg_entropy_span(data)
+        if k == 0:
+            header = bytearray(data[:sos])
+            i = 2
+            while i < sos:
+                if header[i + 1] == 0xC0:
+                    header[i + 5 : i + 7] = total_h.to_bytes(2, "big")
+                i += 2 + int.from_bytes(header[i + 2 : i + 4], "big")
+            out += header
+            out += b"\xff\xdd\x00\x04" + restart_interval.to_bytes(2, "big")
+            out += data[sos:body]
+        else:
+            out += bytes((0xFF, 0xD0 + (k - 1) % 8))
+        out += data[body:-2]
+    out += b"\xff\xd9"
+    return bytes(out)
+
+
+def _encode_long_strips(
+    resized_images: List[Image.Image],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    profile: str = "final",
+    width: int = CANVAS_WIDTH,
+    workers: int = JPEG_STRIP_WORKERS,
+) -> bytes:
+    """
+    긴 JPG를 MCU 행 단위 스트립으로 나눠 합성+인코딩을 병렬로 → restart marker로 이어 붙임
+    - 전체 캔버스 없이 스트립만 메모리에 (동시에 workers개)
+    - 스트립끼리 Huffman 표가 같아야 하므로 optimize는 끔 (표준 표, 파일이 조금 커짐)
+    - progressive 프로필은 스캔 구조상 나눌 수 없어 기존 1패스(_save_jpg_bytes)로 처리
+    - 디코드 결과는 같은 옵션(optimize 제외)의 1패스 인코딩과 픽셀 동일
+    """
+    opts = dict(JPEG_PROFILES.get(profile) or JPEG_PROFILES["final"])
+    heights = [im.size[1] for im in resized_images]
+    total_h = _calc_total_height(heights, top_pad, bottom_pad, gap) if heights else top_pad + bottom_pad
+    if opts.get("progressive") or not 0 < total_h <= JPEG_MAX_DIM:
+        return _save_jpg_bytes(_compose_long_jpg(resized_images, top_pad, bottom_pad, gap, width=width), profile)
+    opts["optimize"] = False
+
+    mcu_w, mcu_h = _jpeg_mcu_size(opts)
+    mcu_cols = -(-width // mcu_w)
+    mcu_rows = -(-total_h // mcu_h)
+    # restart interval(스트립당 MCU 수)은 16비트 → 스트립 높이 상한
+    max_rows = max(1, 0xFFFF // mcu_cols)
+    rows = max(1, min(max_rows, -(-mcu_rows // max(1, workers))))
+    strip_h = rows * mcu_h
+    bounds = [(y, min(total_h, y + strip_h)) for y in range(0, total_h, strip_h)]
+    if len(bounds) == 1:
+        return _save_jpg_bytes(_compose_long_jpg(resized_images, top_pad, bottom_pad, gap, width=width), profile)
+
+    def _one(b: Tuple[int, int]) -> bytes:
+        out = io.BytesIO()
+        _compose_strip(resized_images, top_pad, bottom_pad, gap, b[0], b[1], width=width).save(out, format="JPEG", **opts)
+        return out.getvalue()
+
+    with _thread_pool(min(len(bounds), workers)) as ex:
+        strips = list(ex.map(_one, bounds))
+    return _stitch_jpeg_strips(strips, total_h, mcu_cols * rows)
+
+
 def _calc_total_height(resized_heights: List[int], top_pad: int, bottom_pad: int, gap: int) -> int:
     if not resized_heights:
         return 0
     return top_pad + bottom_pad + sum(resized_heights) + gap * (len(resized_heights) - 1)
 
 
+def _split_parts(seq: list) -> List[list]:
+    # ✅ 분할 규칙: MAX_PER_PSD장 초과 시 앞 MAX_PER_PSD장 / 나머지로 2개
+    if len(seq) <= MAX_PER_PSD:
+        return [seq]
+    return [seq[:MAX_PER_PSD], seq[MAX_PER_PSD:]]
+
+
+def _layout_estimate(
+    dims: List[Tuple[int, int]],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    bytes_per_px: float = DEFAULT_EST_BYTES_PER_PX,
+) -> dict:
+    """
+    저장된 치수(w, h)만으로 결과 예측 (픽셀 접근 없음)
+    - 전체 높이 / PSD 분할별 높이 / 예상 JPG 크기(이미지 영역 픽셀 × bytes_per_px)
+    """
+    heights = [_scaled_height(w, h) for w, h in dims]
+    parts = _split_parts(heights)
+    content_px = CANVAS_WIDTH * sum(heights)
+    return {
+        "heights": heights,
+        "total_height": _calc_total_height(heights, top_pad, bottom_pad, gap),
+        "parts": [{"count": len(p), "height": _calc_total_height(p, top_pad, bottom_pad, gap)} for p in parts if p],
+        "content_px": content_px,
+        "est_bytes": int(content_px * bytes_per_px),
+    }
+
+
+def _minimap_svg(heights: List[int], top_pad: int, bottom_pad: int, gap: int, view_h: int = 360, view_w: int = 90) -> str:
+    """
+    와이어프레임 미니맵(SVG): 이미지 영역은 회색 블록, PSD 분할 지점은 빨간 점선
+    """
+    total = _calc_total_height(heights, top_pad, bottom_pad, gap)
+    if total <= 0:
+        return ""
+    k = view_h / float(total)
+    rects = []
+    y = top_pad
+    for i, h in enumerate(heights):
+        if i == MAX_PER_PSD:
+            sy = (y - gap / 2.0) * k
+            rects.append(f'<line x1="0" y1="{sy:.1f}" x2="{view_w}" y2="{sy:.1f}" stroke="#d9534f" stroke-width="1.5" stroke-dasharray="4 3"/>')
+        rects.append(f'<rect x="6" y="{y * k:.1f}" width="{view_w - 12}" height="{max(1.0, h * k):.1f}" fill="#9aa7a0"/>')
+        rects.append(f'<text x="{view_w / 2:.0f}" y="{(y + h / 2.0) * k + 4:.1f}" font-size="10" text-anchor="middle" fill="#fff">{i + 1}</text>')
+        y += h + gap
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{view_w}" height="{view_h}" viewBox="0 0 {view_w} {view_h}">'
+        f'<rect x="0" y="0" width="{view_w}" height="{view_h}" fill="#fff" stroke="#ccc"/>'
+        + "".join(rects)
+        + "</svg>"
+    )
+
+
 def _build_jsx(
     base_name: str,
     canvas_h: int,
@@ -720,6 +1307,203 @@ def _build_jsx(
     return "\n".join(lines)
 
 
+def _downscale_chain(
+    src: Image.Image, base: Image.Image, widths: List[int], upscale: bool = False
+) -> List[Tuple[int, Image.Image]]:
+    """
+    한 번 디코드한 원본으로 여러 폭의 렌디션 생성 (큰 폭 → 작은 폭 순으로 이전 결과에서 다시 축소)
+    - CANVAS_WIDTH 이하는 900px 작업본(base)에서 시작, 초과 폭은 원본(src)에서
+    - 원본보다 큰 폭: upscale=False면 건너뜀(srcset), True면 원본에서 확대(폭별 긴 JPG)
+    """
+    from PIL import Image
+
+    out: List[Tuple[int, Image.Image]] = []
+    prev = None
+    for w in sorted(set(int(x) for x in widths), reverse=True):
+        if w > CANVAS_WIDTH:
+            if w > src.size[0] and not upscale:
+                continue
+            cur_src = prev if prev is not None and prev.size[0] > w else src
+        elif w == CANVAS_WIDTH:
+            out.append((w, base))
+            prev = base
+            continue
+        else:
+            cur_src = prev if prev is not None and prev.size[0] <= base.size[0] else base
+        h = max(1, int(round(cur_src.size[1] * w / float(cur_src.size[0]))))
+        im = cur_src.resize((w, h), resample=Image.Resampling.LANCZOS)
+        if im.mode != "RGB":
+            im = im.convert("RGB")
+        out.append((w, im))
+        prev = im
+    return out
+
+
+def _plan_widths(
+    sources: List[Image.Image], bases: List[Image.Image], widths: List[int], top_pad: int, bottom_pad: int, gap: int
+) -> Tuple[List[int], List[dict], List[dict]]:
+    """
+    추가 폭 긴 JPG를 만들기 전에 크기부터 계산 → (만들 폭, 건너뛴 폭, 확대되는 폭)
+    - 건너뜀: 폭 비율로 늘린 전체 높이가 JPEG_MAX_DIM을 넘는 폭 [{"width", "height"}]
+    - 확대: 원본 폭이 그 폭보다 좁아 늘려서 만드는 사진이 있는 폭 [{"width", "count"}]
+    - 높이는 900px 작업본 높이 × 폭 비율 (단계 축소의 반올림 오차만큼 장수를 더해 여유)
+    """
+    ok: List[int] = []
+    skipped: List[dict] = []
+    upscaled: List[dict] = []
+    for w in sorted(set(int(x) for x in widths if int(x) > 0 and int(x) != CANVAS_WIDTH), reverse=True):
+        k = w / float(CANVAS_WIDTH)
+        est_h = _calc_total_height(
+            [int(round(b.size[1] * k)) for b in bases], int(round(top_pad * k)), int(round(bottom_pad * k)), int(round(gap * k))
+        ) + len(bases)
+        if est_h > JPEG_MAX_DIM:
+            skipped.append({"width": w, "height": est_h})
+            continue
+        ok.append(w)
+        n_up = sum(1 for src in sources if src.size[0] < w)
+        if n_up:
+            upscaled.append({"width": w, "count": n_up})
+    return ok, skipped, upscaled
+
+
+def _build_width_pyramid(
+    sources: List[Image.Image],
+    bases: List[Image.Image],
+    widths: List[int],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    profile: str,
+    strip_encode: bool = False,
+) -> List[Tuple[int, bytes, int]]:
+    """
+    추가 폭(예: 1800/640)의 긴 JPG → [(폭, jpg bytes, 높이), ...]
+    - 원본별 디코드 1번, 큰 폭부터 단계적으로 축소 (1800 → 900 작업본 → 640), 원본 간 병렬
+    - 폭별 합성/인코딩도 병렬. 여백은 900px 기준 값을 폭 비율로 환산
+    - strip_encode: 폭별 긴 JPG도 스트립 인코딩 (_encode_long_strips)
+    """
+    widths = sorted(set(int(w) for w in widths if int(w) > 0 and int(w) != CANVAS_WIDTH), reverse=True)
+    if not widths or not sources:
+        return []
+
+    with _thread_pool(min(len(sources), PYRAMID_WORKERS)) as ex:
+        chains = list(ex.map(lambda pair: dict(_downscale_chain(pair[0], pair[1], widths, upscale=True)), zip(sources, bases)))
+
+    def _one(w: int) -> Tuple[int, bytes, int]:
+        k = w / float(CANVAS_WIDTH)
+        ims = [c[w] for c in chains]
+        top, bottom, g = int(round(top_pad * k)), int(round(bottom_pad * k)), int(round(gap * k))
+        if strip_encode:
+            h = _calc_total_height([im.size[1] for im in ims], top, bottom, g)
+            return w, _encode_long_strips(ims, top, bottom, g, profile, width=w), h
+        canvas = _compose_long_jpg(ims, top, bottom, g, width=w)
+        return w, _save_jpg_bytes(canvas, profile), canvas.size[1]
+
+    with _thread_pool(min(len(widths), PYRAMID_WORKERS)) as ex:
+        return list(ex.map(_one, widths))
+
+
+def _webp_chunks(data: bytes) -> List[Tuple[bytes, bytes]]:
+    # RIFF/WEBP 파일 → [(fourcc, payload), ...]
+    out = []
+    i = 12
+    while i + 8 <= len(data):
+        size = int.from_bytes(data[i + 4 : i + 8], "little")
+        out.append((data[i : i + 4], data[i + 8 : i + 8 + size]))
+        i += 8 + size + (size & 1)
+    return out
+
+
+def _riff_chunk(fourcc: bytes, payload: bytes) -> bytes:
+    return fourcc + len(payload).to_bytes(4, "little") + payload + (b"\x00" if len(payload) & 1 else b"")
+
+
+def _animated_webp_renditions(
+    raw: bytes,
+    sizes: List[Tuple[int, int]],
+    trim_box: Optional[Tuple[int, int, int, int]] = None,
+    quality: int = ANIMATED_WEBP_QUALITY,
+) -> List[bytes]:
+    """
+    애니메이션 GIF/WEBP 원본 → 크기별 애니메이션 WebP (sizes와 같은 순서)
+    - 프레임을 1장씩 seek → 여백 box crop → 크기별 리사이즈 → 정지 WebP 인코딩 후 바로 버림
+      (모든 프레임을 한꺼번에 디코드/보관하지 않음, 메모리에는 인코딩된 프레임만)
+    - 인코딩된 프레임(ALPH + VP8/VP8L 청크)을 ANMF로 감싸 컨테이너(VP8X + ANIM)만 직접 조립
+    - 프레임마다 전체 화면(합성된 프레임, 블렌딩 없음) → 프레임 간 차분을 쓰는 save_all보다 파일이 클 수 있음
+    """
+    from PIL import Image
+
+    src = Image.open(io.BytesIO(raw))
+    loop = min(0xFFFF, int(src.info.get("loop", 1)))
+    encoded: List[List[bytes]] = [[] for _ in sizes]
+    alpha = False
+    idx = 0
+    while True:
+        try:
+            src.seek(idx)
+        except EOFError:
+            break
+        frame = src.convert("RGBA")
+        # WEBP 원본은 디코드 후에야 info["duration"]이 채워짐
+        duration = min(0xFFFFFF, max(0, int(src.info.get("duration", 0) or 0)))
+        if trim_box:
+            frame = frame.crop(trim_box)
+        alpha = alpha or frame.getextrema()[3][0] < 255
+        for k, (w, h) in enumerate(sizes):
+            buf = io.BytesIO()
+            frame.resize((w, h), resample=Image.Resampling.LANCZOS).save(buf, format="WEBP", quality=quality)
+            payload = b"".join(_riff_chunk(c, p) for c, p in _webp_chunks(buf.getvalue()) if c in (b"ALPH", b"VP8 ", b"VP8L"))
+            head = bytes(6) + (w - 1).to_bytes(3, "little") + (h - 1).to_bytes(3, "little") + duration.to_bytes(3, "little")
+            # flags 0x02: 블렌딩 없이 덮어쓰기, dispose 없음
+            encoded[k].append(_riff_chunk(b"ANMF", head + b"\x02" + payload))
+        del frame
+        idx += 1
+
+    out = []
+    for (w, h), frames in zip(sizes, encoded):
+        vp8x = bytes([0x02 | (0x10 if alpha else 0)]) + bytes(3) + (w - 1).to_bytes(3, "little") + (h - 1).to_bytes(3, "little")
+        anim = b"\xff\xff\xff\xff" + loop.to_bytes(2, "little")
+        body = b"WEBP" + _riff_chunk(b"VP8X", vp8x) + _riff_chunk(b"ANIM", anim) + b"".join(frames)
+        out.append(b"RIFF" + len(body).to_bytes(4, "little") + body)
+    return out
+
+
+def _build_html_fragment(
+    entries: List[Tuple[List[Tuple[int, str]], int, int]],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+) -> str:
+    """
+    스토어용 HTML 조각: 이미지마다 <img srcset> + loading="lazy"
+    - entries: [([(폭, 경로), ...], 900 기준 폭, 900 기준 높이), ...]
+    - 여백(top/gap/bottom)은 900px 기준 값을 폭 대비 %로 변환 → 화면 폭에 맞춰 긴 JPG와 같은 비율
+    - 첫 이미지는 바로 로딩(eager), 나머지는 lazy
+    """
+
+    def pct(px: int) -> str:
+        return f"{px * 100.0 / CANVAS_WIDTH:.4f}%"
+
+    lines = []
+    # % 여백은 부모 폭 기준 → 바깥 div로 폭(최대 900px)을 고정하고 안쪽 div에 여백
+    lines.append(f'<div style="max-width:{CANVAS_WIDTH}px;margin:0 auto;">')
+    lines.append(f'<div class="ms-detail" style="background:#fff;padding:{pct(top_pad)} 0 {pct(bottom_pad)} 0;">')
+    for i, (renditions, w, h) in enumerate(entries):
+        renditions = sorted(renditions)
+        srcset = ", ".join(f"{path} {rw}w" for rw, path in renditions)
+        default_src = next((path for rw, path in renditions if rw == CANVAS_WIDTH), renditions[-1][1])
+        margin = f"margin-top:{pct(gap)};" if i > 0 else ""
+        loading = 'loading="eager" fetchpriority="high"' if i == 0 else 'loading="lazy"'
+        lines.append(
+            f'  <img src="{default_src}" srcset="{srcset}" sizes="(max-width: {CANVAS_WIDTH}px) 100vw, {CANVAS_WIDTH}px" '
+            f'width="{w}" height="{h}" {loading} decoding="async" alt="" '
+            f'style="display:block;width:100%;height:auto;{margin}">'
+        )
+    lines.append("</div>")
+    lines.append("</div>")
+    return "\n".join(lines) + "\n"
+
+
 def _build_readme() -> str:
     return (
         "MISHARP 상세페이지 생성기 (내부용)\n\n"
@@ -733,34 +1517,151 @@ def _build_readme() -> str:
         "3) 파일 > 스크립트 > 찾아보기...\n"
         "4) *_psd_build.jsx 실행\n"
         "5) 같은 폴더에 .psd 생성\n\n"
+        "[웹용 HTML] (선택 시)\n"
+        "- web/*.html 조각과 web/img 폴더를 함께 업로드\n\n"
         "ⓒ misharpcompany. All rights reserved.\n"
     )
 
 
+def _zip_write(zf: zipfile.ZipFile, path: str, data, compress_type: int = zipfile.ZIP_DEFLATED) -> None:
+    # 고정 타임스탬프 → 같은 내용이면 같은 ZIP 멤버 (빌드 간 비교/재현 가능)
+    info = zipfile.ZipInfo(path, date_time=ZIP_FIXED_DATE_TIME)
+    info.external_attr = 0o644 << 16
+    info.compress_type = compress_type
+    zf.writestr(info, data)
+
+
 def _zip_bundle(
     base_name: str,
     jpg_bytes: bytes,
     jsx_entries: List[Tuple[str, str]],
     resized_groups: List[Tuple[str, List[Tuple[str, bytes]]]],
-) -> bytes:
+    extra_files: Optional[List[Tuple[str, bytes]]] = None,
+) -> Tuple[bytes, dict]:
+    """
+    번들 ZIP + 매니페스트(멤버별 sha256) 생성 → (zip bytes, manifest)
+    manifest.json도 ZIP 안에 함께 넣음 (다음 빌드와 비교해 변경분 ZIP을 만들 때 사용)
+    """
+    members: List[Tuple[str, bytes, int]] = []
+    members.append((f"{base_name}.jpg", jpg_bytes, zipfile.ZIP_DEFLATED))
+    members.append(("README.txt", _build_readme().encode("utf-8"), zipfile.ZIP_DEFLATED))
+    for jsx_name, jsx_text in jsx_entries:
+        members.append((jsx_name, jsx_text.encode("utf-8"), zipfile.ZIP_DEFLATED))
+    for folder_name, files in resized_groups:
+        for fn, b in files:
+            members.append((f"{folder_name}/{fn}", b, zipfile.ZIP_DEFLATED))
+    for path, b in extra_files or []:
+        # 추가 JPG(폭별/웹 렌디션)는 이미 압축된 데이터 → deflate 생략
+        ctype = zipfile.ZIP_STORED if path.lower().endswith(".jpg") else zipfile.ZIP_DEFLATED
+        members.append((path, b, ctype))
+
+    manifest = {
+        "v": 1,
+        "project": base_name,
+        "members": {path: hashlib.sha256(data).hexdigest() for path, data, _ in members},
+    }
+
     out = io.BytesIO()
     with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        zf.writestr(f"{base_name}.jpg", jpg_bytes)
-        zf.writestr("README.txt", _build_readme())
-        for jsx_name, jsx_text in jsx_entries:
-            zf.writestr(jsx_name, jsx_text)
-        for folder_name, files in resized_groups:
-            for fn, b in files:
-                zf.writestr(f"{folder_name}/{fn}", b)
-    return out.getvalue()
+        for path, data, ctype in members:
+            _zip_write(zf, path, data, ctype)
+        _zip_write(zf, MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True))
+    return out.getvalue(), manifest
+
+
+def _delta_zip(zip_bytes: bytes, manifest: dict, prev_manifest: Optional[dict]) -> Tuple[bytes, dict]:
+    """
+    직전 빌드 매니페스트와 비교해 바뀐/새 멤버만 담은 ZIP → (zip bytes, 요약)
+    - JSX(.jsx)와 manifest.json은 항상 포함
+    - 없어진 멤버는 REMOVED.txt에 목록으로 (압축 해제 후 직접 삭제)
+    """
+    prev = (prev_manifest or {}).get("members", {})
+    cur = manifest.get("members", {})
+    changed = [p for p, h in cur.items() if prev.get(p) != h]
+    always = [p for p in cur if p.lower().endswith(".jsx") and p not in changed]
+    removed = sorted(p for p in prev if p not in cur)
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as src, zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for p in changed + always + [MANIFEST_NAME]:
+            info = src.getinfo(p)
+            _zip_write(zf, p, src.read(info), info.compress_type)
+        if removed:
+            _zip_write(zf, "REMOVED.txt", "\n".join(removed) + "\n")
+    summary = {"changed": len(changed), "removed": len(removed), "total": len(cur), "bytes": out.tell()}
+    return out.getvalue(), summary
+
+
+def _lap(timings: Dict[str, float], key: str, t0: float) -> float:
+    # 단계 시간(ms) 기록 후 현재 시각 반환
+    now = time.perf_counter()
+    timings[key] = (now - t0) * 1000.0
+    return now
+
+
+def _trace_items(items: List[ImgItem]) -> List[dict]:
+    return [
+        {
+            "w": it.pil.size[0],
+            "h": it.pil.size[1],
+            "ext": it.ext,
+            "mode": it.pil.mode,
+            "bytes": it.raw_size or len(it.bytes_data),
+            "frames": it.frames,
+        }
+        for it in items
+    ]
+
+
+@st.cache_resource(show_spinner=False)
+def _process_lock(name: str) -> threading.Lock:
+    # 스크립트는 재실행마다 새 모듈로 실행됨 → 세션/재실행 간 공유할 락은 cache_resource로 프로세스당 1개
+    return threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def _process_dict(name: str) -> dict:
+    # 프로세스 공용 카운터/상태 (같은 이름의 _process_lock과 함께 사용)
+    return {}
+
+
+@st.cache_resource(show_spinner=False)
+def _process_pool(name: str, workers: int) -> ThreadPoolExecutor:
+    # 백그라운드 작업 풀도 같은 이유로 프로세스당 1개 (재실행마다 스레드가 늘지 않게)
+    return ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=name)
+
+
+def _append_trace(record: dict, path: str = TRACE_LOG_PATH) -> None:
+    # 트레이스 기록 실패가 생성 자체를 막으면 안 됨
+    if not path:
+        return
+    try:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with _process_lock("trace"):
+            if TRACE_LOG_MAX_BYTES > 0 and os.path.exists(path) and os.path.getsize(path) >= TRACE_LOG_MAX_BYTES:
+                os.replace(path, path + ".1")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+    except Exception:
+        pass
+
+
+def _zip_member(zip_bytes: bytes, name: str) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        return zf.read(name)
 
 
 def _init_state():
+    st.session_state.setdefault("layout_base_name", "misharp_detailpage")
+    st.session_state.setdefault("layout_gap", DEFAULT_GAP)
+    st.session_state.setdefault("layout_top", DEFAULT_TOP_PAD)
+    st.session_state.setdefault("layout_bottom", DEFAULT_BOTTOM_PAD)
     st.session_state.setdefault(STATE_ITEMS, [])
     st.session_state.setdefault(STATE_SEEN, set())
     st.session_state.setdefault(STATE_LAST_PREVIEW, None)
     st.session_state.setdefault(STATE_LAST_ZIP, None)
     st.session_state.setdefault(STATE_LAST_META, None)
+    st.session_state.setdefault(STATE_LAST_DELTA, None)
 
 
 def _reset_all():
@@ -769,52 +1670,307 @@ def _reset_all():
     st.session_state[STATE_LAST_PREVIEW] = None
     st.session_state[STATE_LAST_ZIP] = None
     st.session_state[STATE_LAST_META] = None
+    st.session_state[STATE_LAST_DELTA] = None
+
+
+def _make_item(
+    name: str,
+    raw: bytes,
+    auto_trim: bool = False,
+    trim_tolerance: int = DEFAULT_TRIM_TOLERANCE,
+    h: Optional[str] = None,
+    trim_box: Optional[Tuple[int, int, int, int]] = None,
+    dhash: Optional[int] = None,
+    store: bool = True,
+) -> ImgItem:
+    # 디코드 + 메타데이터(촬영시각/통과 여부/dHash) + 여백 제거 (세션 상태는 건드리지 않음)
+    # trim_box 지정 시(프로젝트 복원) 자동 판정 대신 그 box로 자름
+    # store=False: 에셋 저장소에 원본을 쓰지 않음 (prefetch → 목록에 실제로 추가될 때 _attach_item이 저장)
+    h = h or _sha1(raw)
+    if dhash is None:
+        dhash = _dhash_bytes(raw)
+    im = _open_image_any(raw)
+    capture_time = _read_capture_time(im)
+    passthrough = _is_passthrough_jpeg(im)
+    box = trim_box
+    if box is None and auto_trim:
+        box = _cached_trim_box(h, int(trim_tolerance), im)
+    if box is not None:
+        im = im.crop(box)
+        passthrough = False
+    ext = os.path.splitext(name)[1].lower().lstrip(".") or "jpg"
+    frames, duration_ms = _anim_info(raw)
+    item = ImgItem(
+        name=name,
+        bytes_data=raw,
+        pil=im,
+        ext=ext,
+        sha1=h,
+        trim_box=box,
+        capture_time=capture_time,
+        jpeg_passthrough=passthrough,
+        dhash=dhash,
+        frames=frames,
+        duration_ms=duration_ms,
+        raw_size=len(raw),
+    )
+    if store:
+        _store_put_original(h, raw, name, ext)
+        _release_anim_bytes(item)
+    return item
+
+
+def _release_anim_bytes(item: ImgItem) -> None:
+    # ✅ 애니메이션 원본(여러 프레임 전체)은 저장소에 고정(pin)되면 세션 메모리에서 비움 → 필요할 때 _item_raw로 읽음
+    # (저장소가 꺼져 있거나 저장 실패면 그대로 메모리에)
+    if item.frames > 1 and item.bytes_data and _store_pin(item.sha1):
+        item.bytes_data = b""
 
 
-def _add_one_image(name: str, raw: bytes) -> bool:
+def _item_raw(it: ImgItem) -> bytes:
+    """
+    원본 바이트 (세션에 없으면 저장소에서 읽고 고정 연장)
+    - 고정 기간(ASSET_STORE_PIN_S) 넘게 세션이 멈춰 있다가 GC로 지워졌으면 FileNotFoundError
+    """
+    if it.bytes_data:
+        return it.bytes_data
+    raw = _store_get_original(it.sha1)
+    if raw is None:
+        raise FileNotFoundError(f"원본이 저장소에 없습니다: {it.name} ({it.sha1[:12]})")
+    _store_pin(it.sha1)
+    return raw
+
+
+def _add_one_image(
+    name: str,
+    raw: bytes,
+    auto_trim: bool = False,
+    trim_tolerance: int = DEFAULT_TRIM_TOLERANCE,
+    skip_similar: bool = False,
+) -> str:
+    # 반환: "added" / "duplicate"(같은 파일) / "similar"(비슷한 사진이라 건너뜀)
     h = _sha1(raw)
     seen = st.session_state[STATE_SEEN]
     if h in seen:
-        return False
-    im = _open_image_any(raw)
-    ext = os.path.splitext(name)[1].lower().lstrip(".") or "jpg"
-    st.session_state[STATE_ITEMS].append(ImgItem(name=name, bytes_data=raw, pil=im, ext=ext, sha1=h))
+        return "duplicate"
+    # ✅ 전체 디코드/여백 제거 전에 축소본 dHash로 먼저 판정
+    dh = _dhash_bytes(raw)
+    similar = _near_dup_of(dh, st.session_state[STATE_ITEMS])
+    if similar is not None and skip_similar:
+        return "similar"
+    item = _make_item(name, raw, auto_trim, trim_tolerance, h=h, dhash=dh)
+    item.near_dup_of = similar.sha1 if similar is not None else None
+    st.session_state[STATE_ITEMS].append(item)
     seen.add(h)
     st.session_state[STATE_SEEN] = seen
-    return True
+    return "added"
 
 
-def _add_items_from_uploads(uploaded_files) -> Tuple[int, int]:
-    added = 0
-    skipped_over_limit = 0
+def _attach_item(item: ImgItem, skip_similar: bool = False) -> str:
+    # 미리 읽어둔(prefetch) 이미지를 목록에 붙이기 (반환값은 _add_one_image와 같음)
+    seen = st.session_state[STATE_SEEN]
+    if item.sha1 in seen:
+        return "duplicate"
+    similar = _near_dup_of(item.dhash, st.session_state[STATE_ITEMS])
+    if similar is not None and skip_similar:
+        return "similar"
+    item.near_dup_of = similar.sha1 if similar is not None else None
+    # 선택만 하고 추가하지 않은 파일은 저장소에 남기지 않도록 여기서 저장
+    _store_put_original(item.sha1, item.bytes_data, item.name, item.ext)
+    _release_anim_bytes(item)
+    st.session_state[STATE_ITEMS].append(item)
+    seen.add(item.sha1)
+    st.session_state[STATE_SEEN] = seen
+    return "added"
 
-    for uf in uploaded_files:
-        remaining = MAX_TOTAL_IMAGES - len(st.session_state[STATE_ITEMS])
-        if remaining <= 0:
-            skipped_over_limit += 1
-            continue
+
+def _upload_key(uf) -> str:
+    return str(getattr(uf, "file_id", None) or f"{uf.name}:{getattr(uf, 'size', 0)}")
+
+
+def _prefetch_one(name: str, raw: bytes, auto_trim: bool, trim_tolerance: int) -> ImgItem:
+    # 해시 + 디코드 + 썸네일까지 미리 (추가 버튼은 결과만 붙임, 저장소 기록은 추가할 때)
+    it = _make_item(name, raw, auto_trim, trim_tolerance, store=False)
+    it.pil.load()
+    _cached_thumb(it.sha1, it.trim_box, it.pil)
+    return it
+
+
+def _submit_with_ctx(fn, *args) -> Future:
+    # 공용 prefetch 풀에 현재 세션 컨텍스트를 붙여서 제출 (st.cache_* 사용 가능하게)
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+    except Exception:
+        ctx = None
+
+    def _run():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    return _process_pool("upload-prefetch", PREFETCH_WORKERS).submit(_run)
+
+
+def _drop_prefetch(pf: Optional[dict] = None) -> None:
+    # 미리 읽은 결과 전부 폐기 (대기 중인 작업은 취소, 실행 중인 작업 결과는 버려짐)
+    pf = pf if pf is not None else st.session_state.pop(STATE_PREFETCH, None)
+    for tasks, _ in (pf or {}).get("files", {}).values():
+        for _, fut in tasks:
+            fut.cancel()
+
+
+def _prefetch_uploads():
+    """
+    file_uploader 선택이 바뀌면(on_change) 바로 백그라운드에서 해시/디코드/썸네일 시작.
+    - 목록에 더 담을 수 있는 장수(MAX_TOTAL_IMAGES - 현재 목록)까지만 (업로더 순서대로, ZIP 안 이미지 포함)
+    - files: 업로드 key → ([(이름, Future)], ZIP 안 전체 이미지 수) — 앞쪽 일부만 미리 읽은 ZIP은 추가 때 나머지를 직접 처리
+    - 업로더에서 빠진 파일, 여백 제거 설정이 바뀐 경우의 결과는 취소/폐기
+    """
+    if PREFETCH_WORKERS <= 0:
+        return
+    uploaded = st.session_state.get("uploader") or []
+    auto_trim = bool(st.session_state.get("auto_trim", False))
+    # 여백 제거를 끄면 추가 버튼도 기본 허용치를 쓰므로 같은 키로 맞춤 (슬라이더 값이 남아 있어도)
+    tolerance = int(st.session_state.get("trim_tolerance", DEFAULT_TRIM_TOLERANCE)) if auto_trim else DEFAULT_TRIM_TOLERANCE
+    opts = (auto_trim, tolerance)
+    current = 0 if st.session_state.get("replace_mode") else len(st.session_state.get(STATE_ITEMS) or [])
+    budget = MAX_TOTAL_IMAGES - current
+
+    pf = st.session_state.get(STATE_PREFETCH)
+    if not pf or pf.get("opts") != opts:
+        _drop_prefetch(pf)
+        pf = {"opts": opts, "files": {}}
+
+    live = set()
+    used = 0
+    for uf in uploaded:
+        key = _upload_key(uf)
+        live.add(key)
+        if key in pf["files"]:
+            used += len(pf["files"][key][0])
+            continue
+        if used >= budget:
+            continue
+        raw = uf.getvalue()
+        if uf.name.lower().endswith(".zip"):
+            entries = _extract_zip_images(raw)
+        else:
+            entries = [(uf.name, raw)]
+        tasks = [(iname, _submit_with_ctx(_prefetch_one, iname, ibytes, *opts)) for iname, ibytes in entries[: budget - used]]
+        pf["files"][key] = (tasks, len(entries))
+        used += len(tasks)
+
+    for key in list(pf["files"]):
+        if key not in live:
+            for _, fut in pf["files"].pop(key)[0]:
+                fut.cancel()
+
+    st.session_state[STATE_PREFETCH] = pf
+
+
+def _add_items_from_uploads(
+    uploaded_files,
+    auto_trim: bool = False,
+    trim_tolerance: int = DEFAULT_TRIM_TOLERANCE,
+    skip_similar: bool = False,
+) -> Tuple[int, int, int]:
+    """
+    → (추가 수, 제한 초과로 빠진 수, 비슷한 사진 수)
+    비슷한 사진: skip_similar면 건너뛴 수, 아니면 추가했지만 목록에 표시한 수
+    """
+    added = 0
+    skipped_over_limit = 0
+    similar = 0
+
+    def _count(status: str):
+        nonlocal added, similar
+        if status == "added":
+            added += 1
+        if status == "similar" or (status == "added" and st.session_state[STATE_ITEMS][-1].near_dup_of):
+            similar += 1
+
+    pf = st.session_state.get(STATE_PREFETCH) or {}
+    prefetched = pf.get("files", {}) if pf.get("opts") == (bool(auto_trim), int(trim_tolerance)) else {}
+
+    for uf in uploaded_files:
+        remaining = MAX_TOTAL_IMAGES - len(st.session_state[STATE_ITEMS])
+        if remaining <= 0:
+            skipped_over_limit += 1
+            continue
 
         raw = uf.getvalue()
         name = uf.name
+        done = 0
+
+        tasks, total = prefetched.get(_upload_key(uf), (None, 0))
+        if tasks is not None:
+            # ✅ 미리 읽어둔 결과 사용 (아직 진행 중이면 그 작업만 기다림)
+            for _, fut in tasks:
+                remaining = MAX_TOTAL_IMAGES - len(st.session_state[STATE_ITEMS])
+                if remaining <= 0:
+                    skipped_over_limit += 1
+                    break
+                _count(_attach_item(fut.result(), skip_similar))
+                done += 1
+            if done >= total or MAX_TOTAL_IMAGES - len(st.session_state[STATE_ITEMS]) <= 0:
+                continue
 
         if name.lower().endswith(".zip"):
-            extracted = _extract_zip_images(raw)
+            # 미리 읽지 못한 나머지(prefetch 한도 밖)부터
+            extracted = _extract_zip_images(raw)[done:]
             for iname, ibytes in extracted:
                 remaining = MAX_TOTAL_IMAGES - len(st.session_state[STATE_ITEMS])
                 if remaining <= 0:
                     skipped_over_limit += 1
                     break
-                if _add_one_image(iname, ibytes):
-                    added += 1
+                _count(_add_one_image(iname, ibytes, auto_trim, trim_tolerance, skip_similar))
         else:
-            if _add_one_image(name, raw):
-                added += 1
+            _count(_add_one_image(name, raw, auto_trim, trim_tolerance, skip_similar))
 
-    return added, skipped_over_limit
+    # 붙이지 않은 결과(중복/비슷한 사진/제한 초과)는 세션에 남기지 않음
+    _drop_prefetch()
+    return added, skipped_over_limit, similar
 
 
-def _build_outputs(base_name: str, top_pad: int, bottom_pad: int, gap: int):
-    items: List[ImgItem] = st.session_state[STATE_ITEMS]
+def _build_outputs(
+    base_name: str,
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    items: Optional[List[ImgItem]] = None,
+    trace_path: Optional[str] = TRACE_LOG_PATH,
+    long_profile: str = DEFAULT_LONG_PROFILE,
+    parts_profile: str = DEFAULT_PARTS_PROFILE,
+    resize_cache: Optional[Dict[tuple, Image.Image]] = None,
+    html_output: bool = False,
+    html_widths: Tuple[int, ...] = HTML_SRCSET_WIDTHS,
+    widths: Optional[List[int]] = None,
+    render_backend: Optional[str] = None,
+    strip_encode: bool = False,
+    animated_webp: bool = False,
+):
+    """
+    - items 미지정 시 세션 목록 사용 (replay 도구는 직접 전달)
+    - long_profile: 긴 JPG 인코딩 프로필 / parts_profile: 번들 img_XX.jpg 프로필 (JPEG_PROFILES)
+    - resize_cache: (sha1, trim_box) → 900px 리사이즈 결과 공유 (배치 생성 시 상품 간 재사용)
+    - html_output: 번들에 web/<base>.html + web/img/ 렌디션(srcset) 추가
+    - widths: 긴 JPG 폭 목록 (900 외 폭은 번들에 <base>_<폭>w.jpg로 추가, PSD 번들은 항상 900)
+    - render_backend: "thread" / "process" (미지정 시 RENDER_BACKEND). process는 리사이즈 + 긴 JPG 합성/인코딩 +
+      파트 인코딩을 작업 프로세스에서 병렬 실행 (timings의 encode_long에 합성/파트 인코딩 포함)
+    - strip_encode: (thread 백엔드) 긴 JPG를 스트립별 합성+인코딩 병렬 → restart marker로 연결
+      (전체 캔버스 없음, timings의 encode_long에 합성 포함, optimize 생략)
+    - animated_webp: (html_output) 움직이는 GIF/WEBP는 web/img/에 애니메이션 WebP 렌디션 (긴 JPG/PSD는 첫 프레임)
+    - 단계별 시간(ms)은 meta["timings_ms"]에 담고 trace_path에 JSONL 1줄 추가
+    """
+    if items is None:
+        items = st.session_state[STATE_ITEMS]
+    backend = render_backend or RENDER_BACKEND
+    strip_used = bool(strip_encode) and backend != "process"
+    timings: Dict[str, float] = {}
+    t_build = time.perf_counter()
+    t = t_build
 
     uniq: List[ImgItem] = []
     seen2 = set()
@@ -824,21 +1980,68 @@ def _build_outputs(base_name: str, top_pad: int, bottom_pad: int, gap: int):
         uniq.append(it)
         seen2.add(it.sha1)
 
-    resized_all = [_fit_to_width_900(it.pil) for it in uniq]
+    try:
+        resized_all = _resize_all(uniq, resize_cache, backend)
+    except BrokenProcessPool:
+        backend = _render_pool_broken()
+        resized_all = _resize_all(uniq, resize_cache, backend)
     heights_all = [im.size[1] for im in resized_all]
-
-    long_img = _compose_long_jpg(resized_all, top_pad=top_pad, bottom_pad=bottom_pad, gap=gap)
-    jpg_bytes = _save_jpg_bytes(long_img)
-
-    if len(resized_all) <= MAX_PER_PSD:
-        parts = [resized_all]
-    else:
-        parts = [resized_all[:MAX_PER_PSD], resized_all[MAX_PER_PSD:]]
+    t = _lap(timings, "resize", t)
+
+    pre_encoded: List[Optional[bytes]] = [None] * len(uniq)
+    jpg_bytes: Optional[bytes] = None
+    if backend == "process":
+        import render_pool
+
+        try:
+            jpg_bytes, pre_encoded = render_pool.encode_bundle(
+                resized_all,
+                top_pad,
+                bottom_pad,
+                gap,
+                CANVAS_WIDTH,
+                JPEG_PROFILES.get(long_profile) or JPEG_PROFILES["final"],
+                JPEG_PROFILES.get(parts_profile) or JPEG_PROFILES["final"],
+                [not it.jpeg_passthrough for it in uniq],
+                RENDER_PROCESSES,
+            )
+            t = _lap(timings, "encode_long", t)
+        except BrokenProcessPool:
+            backend = _render_pool_broken()
+    if jpg_bytes is None and strip_used:
+        jpg_bytes = _encode_long_strips(resized_all, top_pad, bottom_pad, gap, long_profile)
+        t = _lap(timings, "encode_long", t)
+    elif jpg_bytes is None:
+        long_img = _compose_long_jpg(resized_all, top_pad=top_pad, bottom_pad=bottom_pad, gap=gap)
+        t = _lap(timings, "compose", t)
+        jpg_bytes = _save_jpg_bytes(long_img, long_profile)
+        del long_img
+        t = _lap(timings, "encode_long", t)
+
+    width_files: List[Tuple[str, bytes]] = []
+    width_outputs: List[dict] = []
+    widths_skipped: List[dict] = []
+    widths_upscaled: List[dict] = []
+    if widths:
+        sources = [it.pil for it in uniq]
+        ok_widths, widths_skipped, widths_upscaled = _plan_widths(sources, resized_all, list(widths), top_pad, bottom_pad, gap)
+        pyramid = _build_width_pyramid(sources, resized_all, ok_widths, top_pad, bottom_pad, gap, long_profile, strip_used)
+        for w, data, h in pyramid:
+            fn = f"{base_name}_{w}w.jpg"
+            width_files.append((fn, data))
+            width_outputs.append({"width": w, "file": fn, "bytes": len(data), "height": h})
+        if pyramid:
+            t = _lap(timings, "widths", t)
+
+    parts = _split_parts(resized_all)
+    parts_src = _split_parts(uniq)
+    parts_pre = _split_parts(pre_encoded)
+    passthrough_count = 0
 
     jsx_entries: List[Tuple[str, str]] = []
     resized_groups: List[Tuple[str, List[Tuple[str, bytes]]]] = []
 
-    for pi, part_imgs in enumerate(parts, start=1):
+    for pi, (part_imgs, part_items, part_pre) in enumerate(zip(parts, parts_src, parts_pre), start=1):
         part_heights = [im.size[1] for im in part_imgs]
         part_canvas_h = _calc_total_height(part_heights, top_pad, bottom_pad, gap)
 
@@ -848,9 +2051,14 @@ def _build_outputs(base_name: str, top_pad: int, bottom_pad: int, gap: int):
 
         files: List[Tuple[str, bytes]] = []
         fns: List[str] = []
-        for idx, im in enumerate(part_imgs, start=1):
+        for idx, (im, it, pre) in enumerate(zip(part_imgs, part_items, part_pre), start=1):
             fn = f"img_{idx:02d}.jpg"
-            files.append((fn, _save_jpg_bytes(im)))
+            if it.jpeg_passthrough:
+                # ✅ 이미 900px baseline JPEG → 재인코딩 없이 메타데이터만 제거
+                files.append((fn, _strip_jpeg_metadata(it.bytes_data)))
+                passthrough_count += 1
+            else:
+                files.append((fn, pre if pre is not None else _save_jpg_bytes(im, parts_profile)))
             fns.append(fn)
 
         resized_groups.append((folder_name, files))
@@ -865,8 +2073,49 @@ def _build_outputs(base_name: str, top_pad: int, bottom_pad: int, gap: int):
             images_folder_name=folder_name,
         )
         jsx_entries.append((f"{part_base}_psd_build.jsx", jsx_text))
+    t = _lap(timings, "encode_parts", t)
+
+    web_files: List[Tuple[str, bytes]] = []
+    animated_count = 0
+    animated_missing: List[str] = []
+    if html_output:
+        html_entries = []
+        for idx, (it, base_im) in enumerate(zip(uniq, resized_all), start=1):
+            renditions = []
+            chain = _downscale_chain(it.pil, base_im, list(html_widths))
+            anim: Optional[List[bytes]] = None
+            if animated_webp and it.frames > 1:
+                try:
+                    raw = _item_raw(it)
+                except FileNotFoundError:
+                    # 원본이 사라짐 → 첫 프레임 JPG로 만들고 화면에 경고 (조용히 빠지지 않게)
+                    animated_missing.append(it.name)
+                else:
+                    anim = _animated_webp_renditions(raw, [im.size for _, im in chain], it.trim_box)
+                    animated_count += 1
+            for k, (w, im) in enumerate(chain):
+                fn = f"img/img_{idx:02d}_{w}.jpg"
+                if anim is not None:
+                    fn = f"img/img_{idx:02d}_{w}.webp"
+                    data = anim[k]
+                elif w == CANVAS_WIDTH and it.jpeg_passthrough:
+                    data = _strip_jpeg_metadata(it.bytes_data)
+                else:
+                    data = _save_jpg_bytes(im, "progressive")
+                web_files.append((f"web/{fn}", data))
+                renditions.append((w, fn))
+            html_entries.append((renditions, base_im.size[0], base_im.size[1]))
+        html = _build_html_fragment(html_entries, top_pad, bottom_pad, gap)
+        web_files.append((f"web/{base_name}.html", html.encode("utf-8")))
+        t = _lap(timings, "html", t)
+
+    zip_bytes, manifest = _zip_bundle(base_name, jpg_bytes, jsx_entries, resized_groups, width_files + web_files)
+    t = _lap(timings, "zip", t)
+    timings["total"] = (t - t_build) * 1000.0
+    timings = {k: round(v, 2) for k, v in timings.items()}
 
     meta = {
+        "base_name": base_name,
         "count": len(resized_all),
         "total_height": _calc_total_height(heights_all, top_pad, bottom_pad, gap),
         "top": top_pad,
@@ -875,15 +2124,980 @@ def _build_outputs(base_name: str, top_pad: int, bottom_pad: int, gap: int):
         "psd_parts": len(parts),
         "max_total": MAX_TOTAL_IMAGES,
         "max_per_psd": MAX_PER_PSD,
+        "jpeg_profiles": {"long": long_profile, "parts": parts_profile},
+        "render_backend": backend,
+        "strip_encode": strip_used,
+        "passthrough": passthrough_count,
+        "content_px": CANVAS_WIDTH * sum(heights_all),
+        "width_outputs": width_outputs,
+        "widths_skipped": widths_skipped,
+        "widths_upscaled": widths_upscaled,
+        "manifest": manifest,
+        "html": bool(html_output),
+        "html_files": len(web_files),
+        "animated_webp": animated_count,
+        "animated_missing": animated_missing,
+        "timings_ms": timings,
     }
 
-    zip_bytes = _zip_bundle(base_name, jpg_bytes, jsx_entries, resized_groups)
+    _append_trace(
+        {
+            "v": TRACE_VERSION,
+            "ts": _now_kst().isoformat(timespec="seconds"),
+            "items": _trace_items(uniq),
+            "layout": {"top": top_pad, "bottom": bottom_pad, "gap": gap, "width": CANVAS_WIDTH},
+            "jpeg_profiles": {"long": long_profile, "parts": parts_profile},
+            "render_backend": backend,
+            "strip_encode": strip_used,
+            "widths": [CANVAS_WIDTH] + [w["width"] for w in width_outputs],
+            "out": {
+                "jpg_bytes": len(jpg_bytes),
+                "zip_bytes": len(zip_bytes),
+                "total_height": meta["total_height"],
+                "psd_parts": len(parts),
+                "passthrough": passthrough_count,
+                "html_files": len(web_files),
+            },
+            "timings_ms": timings,
+        },
+        trace_path,
+    )
     return jpg_bytes, zip_bytes, meta
 
 
+# =========================================================
+# ASSET STORE (sha1 기준 로컬 디스크 저장소 + 프로젝트 저장/복원)
+# =========================================================
+# objects/<sha1 앞 2자리>/<sha1>/
+#   orig            원본 바이트
+#   info.json       파일명/확장자
+#   work_<v>.png    900px 작업본 (v = 여백 제거 box 또는 full)
+#   thumb_<v>.png   목록 썸네일
+# projects/<label>/<이름>.json  접속 코드 label별 순서(sha1 목록) + 파일명/여백 제거 box + 레이아웃 값
+# 최근 사용 시각은 객체 폴더 mtime으로 기록 → 용량 초과 시 오래된 것부터 삭제(LRU)
+# GC 락 / 작업본 쓰기 풀은 _process_lock / _process_pool (프로세스당 1개), GC는 _store_note_write가 가끔 백그라운드로
+
+
+def _store_enabled() -> bool:
+    return bool(ASSET_STORE_DIR) and ASSET_STORE_MAX_BYTES > 0
+
+
+def _store_obj_dir(sha1: str) -> str:
+    return os.path.join(ASSET_STORE_DIR, "objects", sha1[:2], sha1)
+
+
+def _store_variant(trim_box: Optional[Tuple[int, int, int, int]]) -> str:
+    return "full" if not trim_box else "t" + "_".join(str(int(v)) for v in trim_box)
+
+
+def _store_write(path: str, data: bytes) -> None:
+    # 임시 파일에 쓴 뒤 교체 → 동시 접근 중에도 반쯤 쓴 파일이 보이지 않음
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _store_read(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _store_touch(sha1: str) -> None:
+    # 최근 사용 표시 (고정(pin)된 객체의 미래 mtime은 당기지 않음)
+    try:
+        d = _store_obj_dir(sha1)
+        if os.stat(d).st_mtime <= time.time():
+            os.utime(d, None)
+    except OSError:
+        pass
+
+
+def _store_pin(sha1: str) -> bool:
+    """
+    원본을 저장소에만 두고 쓰는 동안 GC에서 제외: 객체 mtime을 지금 + ASSET_STORE_PIN_S로 (파일 기준 → 서버 프로세스가 여럿이어도 유효)
+    - 남은 기간이 절반 이상이면 그대로 (재실행마다 utime 하지 않게)
+    - 원본이 저장소에 있으면 True
+    """
+    if not _store_enabled():
+        return False
+    d = _store_obj_dir(sha1)
+    try:
+        now = time.time()
+        if os.stat(d).st_mtime < now + ASSET_STORE_PIN_S / 2:
+            t = now + ASSET_STORE_PIN_S
+            os.utime(d, (t, t))
+    except OSError:
+        return False
+    return os.path.exists(os.path.join(d, "orig"))
+
+
+def _pin_session_items() -> None:
+    # 세션 메모리에 없는(저장소에 고정된) 원본은 세션이 살아 있는 동안 고정 연장 (목록 + 배치 상품)
+    items = list(st.session_state.get(STATE_ITEMS) or [])
+    for product in st.session_state.get(STATE_BATCH_PRODUCTS) or []:
+        items.extend(product["items"])
+    for sha1 in {it.sha1 for it in items if not it.bytes_data}:
+        _store_pin(sha1)
+
+
+def _store_put_original(sha1: str, raw: bytes, name: str, ext: str) -> None:
+    if not _store_enabled():
+        return
+    try:
+        d = _store_obj_dir(sha1)
+        if not os.path.exists(os.path.join(d, "orig")):
+            _store_write(os.path.join(d, "orig"), raw)
+            _store_write(os.path.join(d, "info.json"), json.dumps({"name": name, "ext": ext}, ensure_ascii=False).encode("utf-8"))
+            _store_note_write(len(raw))
+        else:
+            _store_touch(sha1)
+    except OSError:
+        pass
+
+
+def _store_get_original(sha1: str) -> Optional[bytes]:
+    if not _store_enabled():
+        return None
+    data = _store_read(os.path.join(_store_obj_dir(sha1), "orig"))
+    if data is not None:
+        _store_touch(sha1)
+    return data
+
+
+def _store_get_png(sha1: str, kind: str, trim_box) -> Optional[bytes]:
+    if not _store_enabled():
+        return None
+    return _store_read(os.path.join(_store_obj_dir(sha1), f"{kind}_{_store_variant(trim_box)}.png"))
+
+
+def _store_put_png(sha1: str, kind: str, trim_box, data: bytes) -> None:
+    # 원본이 저장된 객체에만 파생본 저장 (원본 없는 파생본은 복원에 쓸 수 없음)
+    if not _store_enabled():
+        return
+    d = _store_obj_dir(sha1)
+    if not os.path.exists(os.path.join(d, "orig")):
+        return
+    try:
+        _store_write(os.path.join(d, f"{kind}_{_store_variant(trim_box)}.png"), data)
+    except OSError:
+        pass
+
+
+def _store_get_work(it: ImgItem) -> Optional[Image.Image]:
+    data = _store_get_png(it.sha1, "work", it.trim_box)
+    if data is None:
+        return None
+    from PIL import Image
+
+    try:
+        im = Image.open(io.BytesIO(data))
+        im.load()
+    except Exception:
+        return None
+    return im if im.size[0] == CANVAS_WIDTH else None
+
+
+def _store_put_work(it: ImgItem, im: Image.Image) -> None:
+    # PNG 인코딩/쓰기는 백그라운드에서 (생성 시간에 더하지 않음)
+    if not _store_enabled():
+        return
+
+    def _write():
+        out = io.BytesIO()
+        im.save(out, format="PNG", compress_level=1)
+        _store_put_png(it.sha1, "work", it.trim_box, out.getvalue())
+
+    _process_pool("asset-store", 1).submit(_write)
+
+
+def _store_note_write(nbytes: int) -> None:
+    """
+    새로 쓴 바이트를 누적 → ASSET_STORE_GC_EVERY_BYTES 이상이거나 ASSET_STORE_GC_INTERVAL_S가 지났으면
+    GC를 저장소 쓰기 풀(작업자 1개)에 넘김 → 업로드 경로에서는 저장소 전체를 훑지 않음
+    """
+    now = time.time()
+    with _process_lock("store-gc-due"):
+        due = _process_dict("store-gc-due")
+        due["pending"] = due.get("pending", 0) + nbytes
+        if due["pending"] < ASSET_STORE_GC_EVERY_BYTES and now - due.get("last", 0.0) < ASSET_STORE_GC_INTERVAL_S:
+            return
+        due["pending"] = 0
+        due["last"] = now
+    _process_pool("asset-store", 1).submit(_store_gc, None, _process_lock("store-gc"))
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for e in os.scandir(path):
+        if e.is_file(follow_symlinks=False):
+            total += e.stat(follow_symlinks=False).st_size
+    return total
+
+
+def _store_gc(max_bytes: Optional[int] = None, lock: Optional[threading.Lock] = None) -> int:
+    """
+    저장소 용량이 max_bytes를 넘으면 최근 사용 시각(mtime)이 오래된 객체부터 삭제.
+    mtime이 미래인 객체(_store_pin으로 고정)는 지우지 않음.
+    목표는 상한의 90% (매 업로드마다 GC가 돌지 않도록 여유 확보). 삭제한 객체 수 반환.
+    - lock: 백그라운드 스레드에서 부를 때 호출 측에서 미리 받은 GC 락 (스레드에는 세션 컨텍스트가 없음)
+    """
+    import shutil
+
+    max_bytes = ASSET_STORE_MAX_BYTES if max_bytes is None else max_bytes
+    root = os.path.join(ASSET_STORE_DIR, "objects")
+    if not os.path.isdir(root):
+        return 0
+
+    with lock or _process_lock("store-gc"):
+        objs = []
+        total = 0
+        for shard in os.scandir(root):
+            if not shard.is_dir():
+                continue
+            for obj in os.scandir(shard.path):
+                if not obj.is_dir():
+                    continue
+                size = _dir_size(obj.path)
+                objs.append((obj.stat().st_mtime, size, obj.path))
+                total += size
+        if total <= max_bytes:
+            return 0
+
+        removed = 0
+        target = int(max_bytes * 0.9)
+        now = time.time()
+        for mtime, size, path in sorted(objs):
+            if total <= target or mtime > now:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def _manifest_path(project: str, owner: str) -> str:
+    return os.path.join(ASSET_STORE_DIR, "manifests", _sanitize_filename(owner), f"{_sanitize_filename(project)}.json")
+
+
+def _prev_manifest(project: str, owner: str) -> Optional[dict]:
+    # 이 사용자가 같은 파일명으로 마지막에 "받은" 번들의 매니페스트: 세션 → 디스크 저장소(사용자별) 순
+    m = st.session_state.get(STATE_MANIFESTS, {}).get(project)
+    if m is None and _store_enabled():
+        data = _store_read(_manifest_path(project, owner))
+        if data is not None:
+            try:
+                m = json.loads(data.decode("utf-8"))
+            except ValueError:
+                m = None
+    return m
+
+
+def _remember_manifest(project: str, owner: str, manifest: dict) -> None:
+    manifests = st.session_state.setdefault(STATE_MANIFESTS, {})
+    manifests[project] = manifest
+    if _store_enabled():
+        try:
+            _store_write(_manifest_path(project, owner), json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+        except OSError:
+            pass
+
+
+def _remember_download_cb(project: str, manifest: dict) -> None:
+    # 전체/변경분 ZIP을 실제로 다운로드했을 때만 기준 매니페스트 갱신 (생성만 하고 안 받은 빌드는 기준이 되지 않음)
+    _remember_manifest(project, _user_namespace(), manifest)
+
+
+def _user_namespace() -> str:
+    # 프로젝트/매니페스트 이름공간 = 로그인한 접속 코드 label (인증 OFF면 "AUTH_OFF" 하나)
+    return _sanitize_filename(str(st.session_state.get(STATE_AUTH_LABEL) or "AUTH_OFF"))
+
+
+def _project_dir(owner: str) -> str:
+    return os.path.join(ASSET_STORE_DIR, "projects", _sanitize_filename(owner))
+
+
+def _project_path(name: str, owner: str) -> str:
+    return os.path.join(_project_dir(owner), f"{_sanitize_filename(name)}.json")
+
+
+def _project_save(name: str, items: List[ImgItem], layout: dict, owner: str, overwrite: bool = False) -> str:
+    """
+    프로젝트 = 순서대로의 sha1 목록 + 파일명/여백 제거 box + 레이아웃 값.
+    원본은 추가 시점에 이미 저장소에 있으므로 여기서는 JSON만 기록.
+    - owner(접속 코드 label)별 폴더 → 다른 사람의 같은 이름 프로젝트와 섞이지 않음
+    - 같은 이름이 이미 있으면 overwrite=True일 때만 덮어씀 (아니면 FileExistsError)
+    """
+    path = _project_path(name, owner)
+    if not overwrite and os.path.exists(path):
+        raise FileExistsError(path)
+    for it in items:
+        if it.bytes_data:
+            _store_put_original(it.sha1, it.bytes_data, it.name, it.ext)
+        else:
+            _store_touch(it.sha1)
+    doc = {
+        "v": 1,
+        "name": _sanitize_filename(name),
+        "saved_at": _now_kst().isoformat(timespec="seconds"),
+        "layout": layout,
+        "items": [{"sha1": it.sha1, "name": it.name, "trim_box": list(it.trim_box) if it.trim_box else None} for it in items],
+    }
+    _store_write(path, json.dumps(doc, ensure_ascii=False, indent=1).encode("utf-8"))
+    return doc["name"]
+
+
+def _project_list(owner: str) -> List[str]:
+    d = _project_dir(owner)
+    if not os.path.isdir(d):
+        return []
+    files = [e for e in os.scandir(d) if e.is_file() and e.name.endswith(".json")]
+    files.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    return [e.name[: -len(".json")] for e in files]
+
+
+def _project_load(name: str, owner: str) -> Tuple[List[ImgItem], dict, int]:
+    """
+    저장소에서 프로젝트 복원 (업로드/재해시 없음) → (items, layout, 누락 개수)
+    GC로 원본이 지워진 이미지는 건너뛰고 누락 개수로 알려줌.
+    """
+    data = _store_read(_project_path(name, owner))
+    if data is None:
+        return [], {}, 0
+    doc = json.loads(data.decode("utf-8"))
+
+    items: List[ImgItem] = []
+    missing = 0
+    for e in doc.get("items", []):
+        sha1 = e.get("sha1", "")
+        raw = _store_get_original(sha1)
+        if raw is None:
+            missing += 1
+            continue
+        box = tuple(e["trim_box"]) if e.get("trim_box") else None
+        items.append(_make_item(e.get("name") or sha1[:12], raw, h=sha1, trim_box=box))
+    return items, doc.get("layout", {}), missing
+
+
+# =========================================================
+# BATCH (여러 상품 한 번에)
+# =========================================================
+def _thread_pool(workers: int) -> ThreadPoolExecutor:
+    # 작업 스레드에도 현재 세션 컨텍스트 연결 (st.cache_* 경고 방지)
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+    except Exception:
+        ctx = None
+
+    def _init():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    return ThreadPoolExecutor(max_workers=max(1, workers), initializer=_init)
+
+
+def _extract_zip_products(zip_bytes: bytes) -> List[Tuple[str, List[Tuple[str, bytes]]]]:
+    """
+    상품별 폴더 ZIP → [(상품명, [(파일명, bytes), ...]), ...]
+    - 모든 이미지가 공통으로 들어있는 감싸는 폴더를 걷어낸 뒤, 그 아래 첫 폴더명을 상품명으로 사용
+      (A/detail/01.jpg, B/detail/01.jpg → 상품 A, B / 상품 폴더 안 하위 폴더는 같은 상품)
+    - ZIP 루트에 있는 이미지는 "product" 로 묶음
+    - 상품 안 파일은 상품 폴더 기준 경로로 자연 정렬
+    """
+    found: List[Tuple[List[str], str, bytes]] = []
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            name = info.filename
+            base = os.path.basename(name)
+            if name.startswith("__MACOSX/") or base.startswith("._"):
+                continue
+            if not _is_image_filename(name):
+                continue
+            parts = [p for p in name.split("/") if p]
+            found.append((parts[:-1], base, zf.read(info)))
+
+    # 감싸는 폴더 깊이: 모든 이미지의 공통 폴더 (단, 이미지마다 상품 폴더 1단계는 남김)
+    shallowest = min((len(dirs) for dirs, _, _ in found), default=0)
+    wrap = 0
+    while wrap < shallowest - 1 and len({dirs[wrap] for dirs, _, _ in found}) == 1:
+        wrap += 1
+
+    groups: Dict[str, List[Tuple[str, str, bytes]]] = {}
+    for dirs, base, data in found:
+        product = dirs[wrap] if len(dirs) > wrap else "product"
+        rel = "/".join(dirs[wrap + 1 :] + [base])
+        groups.setdefault(product, []).append((rel, base, data))
+
+    out = []
+    for product in sorted(groups, key=_natural_key):
+        files = sorted(groups[product], key=lambda x: _natural_key(x[0]))
+        out.append((product, [(base, data) for _, base, data in files]))
+    return out
+
+
+def _ingest_products(
+    groups: List[Tuple[str, List[Tuple[str, bytes]]]],
+    auto_trim: bool = False,
+    trim_tolerance: int = DEFAULT_TRIM_TOLERANCE,
+    workers: int = BATCH_WORKERS,
+) -> List[dict]:
+    """
+    상품별 목록 생성 → [{"name", "items", "skipped", "enabled"}, ...]
+    - 상품 안 중복(sha1)은 제외, 상품당 최대 MAX_TOTAL_IMAGES장
+    - 같은 사진이 여러 상품에 있어도 디코드는 sha1당 1번 (작업 풀에서 병렬)
+    """
+    plan = []
+    raw_by_hash: Dict[str, Tuple[str, bytes]] = {}
+    used_names = set()
+    for product, files in groups:
+        seen = set()
+        entries: List[Tuple[str, str]] = []
+        for fn, raw in files:
+            h = _sha1(raw)
+            if h in seen:
+                continue
+            seen.add(h)
+            entries.append((fn, h))
+            raw_by_hash.setdefault(h, (fn, raw))
+        skipped = max(0, len(entries) - MAX_TOTAL_IMAGES)
+
+        # sanitize 후 같은 이름이 되는 상품은 _2, _3 …
+        pname = base_pname = _sanitize_filename(product)
+        k = 2
+        while pname in used_names:
+            pname = f"{base_pname}_{k}"
+            k += 1
+        used_names.add(pname)
+        plan.append((pname, entries[:MAX_TOTAL_IMAGES], skipped))
+
+    needed = list(dict.fromkeys(h for _, entries, _ in plan for _, h in entries))
+
+    def _decode(h: str) -> ImgItem:
+        fn, raw = raw_by_hash[h]
+        it = _make_item(fn, raw, auto_trim, trim_tolerance, h=h)
+        # 여기서 픽셀까지 디코드 (여러 상품이 같은 이미지를 공유 → 생성 중 동시 lazy-load 방지)
+        it.pil.load()
+        return it
+
+    with _thread_pool(workers) as ex:
+        decoded = dict(zip(needed, ex.map(_decode, needed)))
+
+    products = []
+    for pname, entries, skipped in plan:
+        items = [replace(decoded[h], name=fn) for fn, h in entries]
+        products.append({"name": pname, "items": items, "skipped": skipped, "enabled": True})
+    return products
+
+
+def _build_batch(
+    products: List[dict],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    long_profile: str = DEFAULT_LONG_PROFILE,
+    parts_profile: str = DEFAULT_PARTS_PROFILE,
+    workers: int = BATCH_WORKERS,
+) -> Tuple[bytes, dict]:
+    """
+    여러 상품을 작업 풀에서 한 번에 생성 → 통합 ZIP 1개
+    - 리사이즈 캐시는 상품 간 공유 (같은 사진은 1번만 리사이즈)
+    - ZIP 구성: <상품>/<상품>.jpg + <상품>/<상품>_bundle.zip
+    """
+    targets = [p for p in products if p.get("enabled", True) and p.get("items")]
+    resize_cache: Dict[tuple, Image.Image] = {}
+
+    t0 = time.perf_counter()
+    with _thread_pool(workers) as ex:
+        futures = [
+            ex.submit(
+                _build_outputs,
+                p["name"],
+                top_pad,
+                bottom_pad,
+                gap,
+                items=p["items"],
+                long_profile=long_profile,
+                parts_profile=parts_profile,
+                resize_cache=resize_cache,
+            )
+            for p in targets
+        ]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - t0
+
+    out = io.BytesIO()
+    per_product = []
+    # 결과물(JPG/ZIP)은 이미 압축된 데이터 → 다시 deflate하지 않고 저장만
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as zf:
+        for p, (jpg_bytes, zip_bytes, meta) in zip(targets, results):
+            name = p["name"]
+            zf.writestr(f"{name}/{name}.jpg", jpg_bytes)
+            zf.writestr(f"{name}/{name}_bundle.zip", zip_bytes)
+            per_product.append({"name": name, **meta})
+        zf.writestr("README.txt", _build_readme())
+
+    batch_meta = {
+        "products": len(targets),
+        "images": sum(m["count"] for m in per_product),
+        "elapsed_s": round(elapsed, 2),
+        "products_per_min": round(len(targets) / elapsed * 60.0, 1) if elapsed > 0 else 0.0,
+        "workers": workers,
+        "per_product": per_product,
+    }
+    return out.getvalue(), batch_meta
+
+
 # =========================================================
 # UI
 # =========================================================
+@st.cache_data(show_spinner=False, max_entries=512)
+def _cached_thumb(sha1: str, trim_box: Optional[Tuple[int, int, int, int]], _im: Image.Image) -> bytes:
+    # 재실행마다 썸네일을 다시 만들지 않도록 (sha1 + 여백 제거 box 기준, 디스크 저장소도 확인)
+    png = _store_get_png(sha1, "thumb", trim_box)
+    if png is None:
+        png = _make_thumb(_im)
+        _store_put_png(sha1, "thumb", trim_box, png)
+    return png
+
+
+def _move_item(i: int, delta: int):
+    items: List[ImgItem] = st.session_state[STATE_ITEMS]
+    j = i + delta
+    if 0 <= i < len(items) and 0 <= j < len(items):
+        items[i], items[j] = items[j], items[i]
+        st.session_state[STATE_ITEMS] = items
+
+
+def _move_item_to(i: int, pos: int):
+    # i번째 이미지를 pos(0-base) 위치로 한 번에 이동
+    items: List[ImgItem] = st.session_state[STATE_ITEMS]
+    if not (0 <= i < len(items)):
+        return
+    pos = max(0, min(len(items) - 1, pos))
+    it = items.pop(i)
+    items.insert(pos, it)
+    st.session_state[STATE_ITEMS] = items
+
+
+def _sort_item_list(items: List[ImgItem], mode: str) -> None:
+    """
+    일괄 정렬 (픽셀은 건드리지 않고 추가 시점에 저장한 메타데이터만 사용)
+    - name: 파일명 자연 정렬
+    - exif: 촬영 시각 순 (시각 없는 이미지는 뒤로, 기존 순서 유지)
+    - reverse: 현재 순서 뒤집기
+    """
+    if mode == "name":
+        items.sort(key=lambda it: _natural_key(it.name))
+    elif mode == "exif":
+        items.sort(key=lambda it: (it.capture_time is None, it.capture_time or ""))
+    elif mode == "reverse":
+        items.reverse()
+
+
+def _sort_items(mode: str):
+    items: List[ImgItem] = st.session_state[STATE_ITEMS]
+    _sort_item_list(items, mode)
+    st.session_state[STATE_ITEMS] = items
+
+
+def _apply_move_to():
+    src = int(st.session_state.get("move_src", 1)) - 1
+    dst = int(st.session_state.get("move_dst", 1)) - 1
+    _move_item_to(src, dst)
+
+
+def _delete_item(i: int):
+    items: List[ImgItem] = st.session_state[STATE_ITEMS]
+    if not (0 <= i < len(items)):
+        return
+    removed = items.pop(i)
+    st.session_state[STATE_ITEMS] = items
+    seen = st.session_state[STATE_SEEN]
+    if removed.sha1 in seen:
+        seen.remove(removed.sha1)
+    st.session_state[STATE_SEEN] = seen
+    if not items:
+        st.session_state[STATE_LIST_EMPTIED] = True
+
+
+def _est_bytes_per_px(long_profile: str) -> float:
+    # 직전 생성 결과(같은 프로필)의 실측 bytes/px → 없으면 기본값
+    meta = st.session_state.get(STATE_LAST_META) or {}
+    jpg = st.session_state.get(STATE_LAST_PREVIEW)
+    if jpg and meta.get("content_px") and meta.get("jpeg_profiles", {}).get("long") == long_profile:
+        return len(jpg) / float(meta["content_px"])
+    return DEFAULT_EST_BYTES_PER_PX
+
+
+def _render_layout_estimate(items: List[ImgItem]):
+    """
+    생성 전 예상 결과 (저장된 치수만 사용 → 재실행마다 수 µs)
+    """
+    top_pad = int(st.session_state.get("layout_top", DEFAULT_TOP_PAD))
+    bottom_pad = int(st.session_state.get("layout_bottom", DEFAULT_BOTTOM_PAD))
+    gap = int(st.session_state.get("layout_gap", DEFAULT_GAP))
+    long_profile = st.session_state.get("long_profile", DEFAULT_LONG_PROFILE)
+
+    seen = set()
+    dims = []
+    for it in items:
+        if it.sha1 in seen:
+            continue
+        seen.add(it.sha1)
+        dims.append(it.pil.size)
+
+    est = _layout_estimate(dims, top_pad, bottom_pad, gap, _est_bytes_per_px(long_profile))
+    if len(est["parts"]) > 1:
+        parts_txt = " + ".join(f"{p['count']}장 {p['height']:,}px" for p in est["parts"])
+        parts_txt = f"{len(est['parts'])}개 ({parts_txt})"
+    else:
+        parts_txt = "1개"
+
+    c1, c2 = st.columns([0.8, 0.2])
+    with c1:
+        st.caption(
+            f"예상 결과 · 최종 높이 **{est['total_height']:,}px** · PSD {parts_txt} · "
+            f"JPG 약 {est['est_bytes'] / (1024 * 1024):.1f}MB"
+        )
+    with c2:
+        with st.popover("미니맵", use_container_width=True):
+            st.markdown(_minimap_svg(est["heights"], top_pad, bottom_pad, gap), unsafe_allow_html=True)
+
+
+@st.fragment
+def _render_item_list():
+    """
+    3) 순서 변경 / 삭제 목록.
+    - fragment로 분리 → ▲/▼/삭제 클릭 시 이 영역만 재실행 (스타일/로그인/업로더/미리보기는 그대로)
+    - 상태 변경은 on_click 콜백에서 처리 → 추가 st.rerun 없이 한 번에 반영
+    - 목록이 비게 되는 삭제만 전체 재실행 (생성 버튼 상태 갱신)
+    """
+    if st.session_state.pop(STATE_LIST_EMPTIED, False):
+        st.rerun()
+
+    items: List[ImgItem] = st.session_state[STATE_ITEMS]
+
+    if not items:
+        st.info("업로드된 이미지가 없습니다.")
+        return
+
+    _render_layout_estimate(items)
+
+    n = len(items)
+    with st.expander("일괄 정렬 / 위치 이동", expanded=False):
+        s1, s2, s3 = st.columns(3)
+        with s1:
+            st.button("파일명 순", key="sort_name", use_container_width=True, on_click=_sort_items, args=("name",))
+        with s2:
+            st.button("촬영시각 순", key="sort_exif", use_container_width=True, on_click=_sort_items, args=("exif",))
+        with s3:
+            st.button("순서 뒤집기", key="sort_rev", use_container_width=True, on_click=_sort_items, args=("reverse",))
+
+        m1, m2, m3 = st.columns([0.36, 0.36, 0.28])
+        with m1:
+            st.number_input("이동할 번호", min_value=1, max_value=n, value=n, step=1, key="move_src")
+        with m2:
+            st.number_input("새 위치", min_value=1, max_value=n, value=1, step=1, key="move_dst")
+        with m3:
+            st.markdown("<div style='height:1.75rem'></div>", unsafe_allow_html=True)
+            st.button("이동", key="move_apply", use_container_width=True, on_click=_apply_move_to)
+
+    pos = {it.sha1: k for k, it in enumerate(items)}
+    for i, it in enumerate(items):
+        # ✅ 마지막 칸(삭제) 폭 약간 키움 → '삭제' 세로 줄바꿈 방지
+        row = st.columns([0.14, 0.54, 0.10, 0.10, 0.12])
+        with row[0]:
+            st.image(_cached_thumb(it.sha1, it.trim_box, it.pil), use_column_width=True)
+        with row[1]:
+            short = it.name if len(it.name) <= 44 else (it.name[:41] + "…")
+            trim_txt = " · 여백 제거됨" if it.trim_box else ""
+            if it.near_dup_of in pos:
+                trim_txt += f" · ⚠️ {pos[it.near_dup_of] + 1}번과 비슷함"
+            if it.frames > 1:
+                trim_txt += f" · 🎞️ {it.frames}프레임 {it.duration_ms / 1000:.1f}초"
+            st.markdown(f"**{i+1}. {short}**  \n원본: {it.pil.size[0]}×{it.pil.size[1]}{trim_txt}")
+        with row[2]:
+            st.button("▲", key=f"up_{i}", disabled=(i == 0), use_container_width=True, on_click=_move_item, args=(i, -1))
+        with row[3]:
+            st.button("▼", key=f"down_{i}", disabled=(i == len(items) - 1), use_container_width=True, on_click=_move_item, args=(i, 1))
+        with row[4]:
+            st.button("삭제", key=f"del_{i}", use_container_width=True, on_click=_delete_item, args=(i,))
+
+
+def _project_save_name() -> str:
+    return (st.session_state.get("project_name") or "").strip() or st.session_state.get("layout_base_name", "")
+
+
+def _save_project_cb(overwrite: bool = False):
+    items: List[ImgItem] = st.session_state[STATE_ITEMS]
+    name = _project_save_name()
+    layout = {
+        "base_name": st.session_state.get("layout_base_name"),
+        "gap": int(st.session_state.get("layout_gap", DEFAULT_GAP)),
+        "top": int(st.session_state.get("layout_top", DEFAULT_TOP_PAD)),
+        "bottom": int(st.session_state.get("layout_bottom", DEFAULT_BOTTOM_PAD)),
+    }
+    st.session_state.pop(STATE_PROJECT_OVERWRITE, None)
+    try:
+        saved = _project_save(name, items, layout, _user_namespace(), overwrite=overwrite)
+        st.session_state[STATE_PROJECT_MSG] = ("success", f"프로젝트 저장 완료: {saved} ({len(items)}장)")
+    except FileExistsError:
+        st.session_state[STATE_PROJECT_OVERWRITE] = _sanitize_filename(name)
+        st.session_state[STATE_PROJECT_MSG] = (
+            "warning",
+            f"같은 이름의 프로젝트가 이미 있습니다: {_sanitize_filename(name)} · 바꾸려면 '덮어쓰기'를 눌러 주세요.",
+        )
+    except OSError as e:
+        st.session_state[STATE_PROJECT_MSG] = ("error", f"프로젝트 저장 실패: {e}")
+
+
+def _load_project_cb():
+    name = st.session_state.get("project_pick")
+    if not name:
+        return
+    items, layout, missing = _project_load(name, _user_namespace())
+    _reset_all()
+    st.session_state[STATE_ITEMS] = items
+    st.session_state[STATE_SEEN] = set(it.sha1 for it in items)
+    if layout.get("base_name"):
+        st.session_state["layout_base_name"] = layout["base_name"]
+    for key, lk in (("layout_gap", "gap"), ("layout_top", "top"), ("layout_bottom", "bottom")):
+        if lk in layout:
+            st.session_state[key] = int(layout[lk])
+    msg = f"프로젝트 불러오기 완료: {name} ({len(items)}장)"
+    if missing:
+        msg += f" · 저장소에서 정리된 이미지 {missing}장은 다시 업로드해 주세요"
+    st.session_state[STATE_PROJECT_MSG] = ("warning" if missing else "success", msg)
+
+
+def _render_project_box():
+    with st.expander("프로젝트 저장 / 불러오기", expanded=False):
+        if not _store_enabled():
+            st.caption("에셋 저장소가 꺼져 있습니다. (MISHARP_ASSET_STORE)")
+            return
+        c1, c2 = st.columns([0.66, 0.34])
+        with c1:
+            st.text_input("저장할 프로젝트 이름", key="project_name", placeholder=st.session_state.get("layout_base_name", ""))
+        with c2:
+            st.markdown("<div style='height:1.75rem'></div>", unsafe_allow_html=True)
+            st.button(
+                "저장",
+                use_container_width=True,
+                disabled=not st.session_state[STATE_ITEMS],
+                on_click=_save_project_cb,
+                key="project_save",
+            )
+        if st.session_state.get(STATE_PROJECT_OVERWRITE) == _sanitize_filename(_project_save_name()):
+            st.button(
+                f"'{st.session_state[STATE_PROJECT_OVERWRITE]}' 덮어쓰기",
+                use_container_width=True,
+                disabled=not st.session_state[STATE_ITEMS],
+                on_click=_save_project_cb,
+                args=(True,),
+                key="project_overwrite_btn",
+            )
+
+        names = _project_list(_user_namespace())
+        c3, c4 = st.columns([0.66, 0.34])
+        with c3:
+            st.selectbox("저장된 프로젝트", options=names, key="project_pick", placeholder="저장된 프로젝트 없음")
+        with c4:
+            st.markdown("<div style='height:1.75rem'></div>", unsafe_allow_html=True)
+            st.button("불러오기", use_container_width=True, disabled=not names, on_click=_load_project_cb, key="project_load")
+
+        msg = st.session_state.pop(STATE_PROJECT_MSG, None)
+        if msg:
+            getattr(st, msg[0])(msg[1])
+
+
+def _batch_sort(pi: int, mode: str):
+    products = st.session_state.get(STATE_BATCH_PRODUCTS) or []
+    if 0 <= pi < len(products):
+        _sort_item_list(products[pi]["items"], mode)
+
+
+def _batch_toggle(pi: int):
+    products = st.session_state.get(STATE_BATCH_PRODUCTS) or []
+    if 0 <= pi < len(products):
+        products[pi]["enabled"] = bool(st.session_state.get(f"batch_on_{pi}", True))
+
+
+def _clear_batch_widget_state():
+    # 상품 체크박스는 순번(batch_on_<i>)으로 키를 잡음 → 새 상품 목록에 이전 선택이 남지 않게 지움
+    for k in [k for k in st.session_state if str(k).startswith("batch_on_")]:
+        del st.session_state[k]
+
+
+def _reset_batch():
+    _clear_batch_widget_state()
+    st.session_state[STATE_BATCH_PRODUCTS] = []
+    st.session_state[STATE_BATCH_ZIP] = None
+    st.session_state[STATE_BATCH_META] = None
+
+
+def _render_batch_mode():
+    """
+    여러 상품(배치) 모드: ① 상품별 폴더 ZIP 업로드 → ② 상품별 순서 확인 → ③ 한 번에 생성
+    """
+    st.session_state.setdefault(STATE_BATCH_PRODUCTS, [])
+    st.session_state.setdefault(STATE_BATCH_ZIP, None)
+    st.session_state.setdefault(STATE_BATCH_META, None)
+
+    left, right = st.columns([1.25, 0.75], gap="large")
+
+    with left:
+        ms_section("1) 상품별 폴더 ZIP 업로드")
+        cA, cB = st.columns([0.66, 0.34])
+        with cA:
+            batch_zip = st.file_uploader(
+                "상품별 폴더가 들어있는 ZIP",
+                type=["zip"],
+                accept_multiple_files=False,
+                label_visibility="collapsed",
+                key="batch_uploader",
+            )
+        with cB:
+            auto_trim = st.checkbox("흰 여백 자동 제거", value=False, key="batch_trim")
+
+        if st.button("상품 불러오기", type="primary", use_container_width=True, disabled=batch_zip is None):
+            groups = _extract_zip_products(batch_zip.getvalue())
+            if not groups:
+                st.warning("ZIP 안에서 이미지를 찾지 못했습니다.")
+            else:
+                with st.spinner("이미지 읽는 중…"):
+                    st.session_state[STATE_BATCH_PRODUCTS] = _ingest_products(groups, auto_trim=auto_trim)
+                _clear_batch_widget_state()
+                st.session_state[STATE_BATCH_ZIP] = None
+                st.session_state[STATE_BATCH_META] = None
+
+        products: List[dict] = st.session_state[STATE_BATCH_PRODUCTS]
+
+        ms_section("2) 상품별 순서 확인")
+        if not products:
+            st.info("불러온 상품이 없습니다. 폴더별로 상품 이미지를 담은 ZIP을 올려주세요.")
+        for pi, p in enumerate(products):
+            n = len(p["items"])
+            title = f"{pi + 1}. {p['name']} · {n}장"
+            if p.get("skipped"):
+                title += f" (제한 초과 {p['skipped']}장 제외)"
+            with st.expander(title, expanded=False):
+                c0, c1, c2, c3 = st.columns([0.22, 0.26, 0.26, 0.26])
+                with c0:
+                    st.checkbox("포함", value=p.get("enabled", True), key=f"batch_on_{pi}", on_change=_batch_toggle, args=(pi,))
+                with c1:
+                    st.button("파일명 순", key=f"batch_name_{pi}", use_container_width=True, on_click=_batch_sort, args=(pi, "name"))
+                with c2:
+                    st.button("촬영시각 순", key=f"batch_exif_{pi}", use_container_width=True, on_click=_batch_sort, args=(pi, "exif"))
+                with c3:
+                    st.button("순서 뒤집기", key=f"batch_rev_{pi}", use_container_width=True, on_click=_batch_sort, args=(pi, "reverse"))
+                st.image(
+                    [_cached_thumb(it.sha1, it.trim_box, it.pil) for it in p["items"]],
+                    width=THUMB_W,
+                    caption=[f"{i + 1}. {it.name}" for i, it in enumerate(p["items"])],
+                )
+
+        ms_section("3) 한 번에 생성")
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            gap = st.number_input("이미지 간 여백(px)", min_value=0, max_value=2000, value=DEFAULT_GAP, step=10, key="batch_gap")
+        with c2:
+            top_pad = st.number_input("상단 여백(px)", min_value=0, max_value=5000, value=DEFAULT_TOP_PAD, step=10, key="batch_top")
+        with c3:
+            bottom_pad = st.number_input("하단 여백(px)", min_value=0, max_value=5000, value=DEFAULT_BOTTOM_PAD, step=10, key="batch_bottom")
+        long_profile = st.selectbox(
+            "긴 JPG 인코딩",
+            options=["final", "progressive", "draft"],
+            format_func=lambda k: JPEG_PROFILE_LABELS[k],
+            key="batch_long_profile",
+        )
+
+        enabled = [p for p in products if p.get("enabled", True) and p["items"]]
+        cX, cY = st.columns([0.72, 0.28])
+        with cX:
+            gen = st.button(
+                f"전체 생성하기 ({len(enabled)}개 상품)",
+                type="primary",
+                use_container_width=True,
+                disabled=not enabled,
+            )
+        with cY:
+            if st.button("배치 초기화", use_container_width=True):
+                _reset_batch()
+                st.rerun()
+
+        if gen and enabled:
+            with st.spinner(f"{len(enabled)}개 상품 생성 중…"):
+                zip_bytes, meta = _build_batch(products, int(top_pad), int(bottom_pad), int(gap), long_profile=long_profile)
+            st.session_state[STATE_BATCH_ZIP] = zip_bytes
+            st.session_state[STATE_BATCH_META] = meta
+            st.success("생성 완료! 오른쪽에서 통합 ZIP을 다운로드하세요.")
+
+    with right:
+        ms_section("배치 결과")
+        meta = st.session_state[STATE_BATCH_META]
+        zip_bytes = st.session_state[STATE_BATCH_ZIP]
+        if meta and zip_bytes:
+            st.caption(
+                f"상품 {meta['products']}개 · 이미지 {meta['images']}장 · "
+                f"{meta['elapsed_s']}초 · 처리량 {meta['products_per_min']} 상품/분 (작업자 {meta['workers']})"
+            )
+            for m in meta["per_product"]:
+                st.caption(f"- {m['name']}: {m['count']}장 · {m['total_height']:,}px · PSD {m['psd_parts']}개")
+            st.download_button(
+                "통합 ZIP 다운로드",
+                data=zip_bytes,
+                file_name=f"misharp_batch_{_now_kst().strftime('%Y%m%d_%H%M')}.zip",
+                mime="application/zip",
+                use_container_width=True,
+            )
+        else:
+            st.info("아직 생성된 결과가 없습니다.")
+
+        with st.expander("배치 ZIP 구성", expanded=True):
+            st.markdown(
+                """
+상품마다 폴더 1개, 폴더 안에 상품 이미지를 넣어 ZIP으로 압축하세요.
+
+```
+batch.zip
+├─ 상품A/ 01.jpg 02.jpg …
+└─ 상품B/ 01.jpg 02.jpg …
+```
+결과 ZIP에는 상품별 `상품.jpg` 와 `상품_bundle.zip`(PSD용)이 들어있습니다.
+                """.strip()
+            )
+
+
+@st.cache_resource(show_spinner=False)
+def _render_pool_ready(workers: int) -> bool:
+    # process 백엔드: 서버 프로세스당 1번 작업 프로세스를 미리 띄워 둠 (첫 생성에 spawn 시간 제외)
+    import render_pool
+
+    render_pool.warm_up(workers)
+    return True
+
+
+def _render_pool_broken() -> str:
+    """
+    process 백엔드 작업 프로세스가 죽음(OOM kill 등) → 죽은 풀과 _render_pool_ready 캐시를 버리고 "thread" 반환
+    - 이번 생성은 thread 백엔드로 마저 진행 (meta의 render_backend도 thread)
+    - 다음 재실행의 _render_pool_ready 가 새 풀을 다시 띄움
+    """
+    import render_pool
+
+    render_pool.discard()
+    _render_pool_ready.clear()
+    return "thread"
+
+
 def main():
     st.set_page_config(page_title=APP_TITLE, layout="wide")
 
@@ -895,6 +3109,9 @@ def main():
 
     sidebar_auth_box()
     _init_state()
+    _pin_session_items()
+    if RENDER_BACKEND == "process":
+        _render_pool_ready(RENDER_PROCESSES)
 
     # Top title (약간 더 아래로)
     st.markdown(
@@ -907,6 +3124,18 @@ def main():
         unsafe_allow_html=True,
     )
 
+    mode = st.radio(
+        "작업 모드",
+        options=["single", "batch"],
+        format_func=lambda k: "단일 상품" if k == "single" else "여러 상품(배치)",
+        horizontal=True,
+        label_visibility="collapsed",
+        key="work_mode",
+    )
+    if mode == "batch":
+        _render_batch_mode()
+        return
+
     left, right = st.columns([1.25, 0.75], gap="large")
 
     with left:
@@ -920,9 +3149,34 @@ def main():
                 accept_multiple_files=True,
                 label_visibility="collapsed",
                 key="uploader",
+                on_change=_prefetch_uploads,
             )
         with cB:
-            replace_mode = st.checkbox("기존 목록 비우고 새로 담기", value=False)
+            replace_mode = st.checkbox("기존 목록 비우고 새로 담기", value=False, key="replace_mode", on_change=_prefetch_uploads)
+            auto_trim = st.checkbox(
+                "흰 여백 자동 제거",
+                value=False,
+                help="추가할 때 이미지 테두리의 흰색/거의 흰색 여백을 잘라냅니다.",
+                key="auto_trim",
+                on_change=_prefetch_uploads,
+            )
+            trim_tolerance = DEFAULT_TRIM_TOLERANCE
+            if auto_trim:
+                trim_tolerance = st.slider(
+                    "여백 판정 허용치",
+                    min_value=0,
+                    max_value=60,
+                    value=DEFAULT_TRIM_TOLERANCE,
+                    step=2,
+                    key="trim_tolerance",
+                    on_change=_prefetch_uploads,
+                )
+            skip_similar = st.checkbox(
+                "비슷한 사진 건너뛰기",
+                value=False,
+                help="같은 컷의 JPG/PNG, 화질만 다른 재저장본 등은 추가하지 않습니다. 끄면 목록에 ⚠️ 표시만 합니다.",
+                key="skip_similar",
+            )
 
         if uploaded:
             st.caption("업로드 선택 파일(최대 10개 표시)")
@@ -943,11 +3197,16 @@ def main():
                 _reset_all()
                 current_count = 0
 
-            added, skipped_limit = _add_items_from_uploads(uploaded)
+            added, skipped_limit, similar = _add_items_from_uploads(uploaded, auto_trim, int(trim_tolerance), skip_similar)
             if added == 0:
                 st.warning("추가된 새 이미지가 없습니다. (중복 제외 또는 제한 초과)")
             else:
                 st.success(f"추가 완료: 새 이미지 {added}개")
+            if similar > 0:
+                if skip_similar:
+                    st.info(f"비슷한 사진 {similar}개는 건너뛰었습니다. (같은 컷의 다른 포맷/재저장본)")
+                else:
+                    st.warning(f"비슷한 사진 {similar}개를 목록에 ⚠️ 로 표시했습니다. 필요 없으면 삭제해 주세요.")
 
             if skipped_limit > 0:
                 st.warning(f"최대 {MAX_TOTAL_IMAGES}장 제한으로 {skipped_limit}개 파일(또는 ZIP 내 이미지)이 추가되지 않았습니다.")
@@ -956,54 +3215,60 @@ def main():
         ms_section("2) 레이아웃 설정")
         c1, c2 = st.columns([0.58, 0.42])
         with c1:
-            base_name_raw = st.text_input("파일명(확장자 제외)", value="misharp_detailpage")
+            base_name_raw = st.text_input("파일명(확장자 제외)", key="layout_base_name")
         with c2:
-            gap = st.number_input("이미지 간 여백(px)", min_value=0, max_value=2000, value=DEFAULT_GAP, step=10)
+            gap = st.number_input("이미지 간 여백(px)", min_value=0, max_value=2000, step=10, key="layout_gap")
 
         base_name = _sanitize_filename(base_name_raw)
 
         with st.expander("상단/하단 여백(기본값은 샘플 기준)", expanded=False):
-            top_pad = st.number_input("상단 여백(px)", min_value=0, max_value=5000, value=DEFAULT_TOP_PAD, step=10)
-            bottom_pad = st.number_input("하단 여백(px)", min_value=0, max_value=5000, value=DEFAULT_BOTTOM_PAD, step=10)
+            top_pad = st.number_input("상단 여백(px)", min_value=0, max_value=5000, step=10, key="layout_top")
+            bottom_pad = st.number_input("하단 여백(px)", min_value=0, max_value=5000, step=10, key="layout_bottom")
+
+        with st.expander("출력 / JPG 인코딩 설정", expanded=False):
+            long_profile = st.selectbox(
+                "긴 JPG",
+                options=["final", "progressive", "draft"],
+                format_func=lambda k: JPEG_PROFILE_LABELS[k],
+                key="long_profile",
+            )
+            parts_profile = st.selectbox(
+                "번들 이미지(img_XX.jpg)",
+                options=["intermediate", "final"],
+                format_func=lambda k: JPEG_PROFILE_LABELS[k],
+                key="parts_profile",
+            )
+            html_output = st.checkbox(
+                "웹용 HTML(반응형 srcset + lazy loading) 함께 생성",
+                value=False,
+                help=f"ZIP의 web/ 폴더에 HTML 조각과 {', '.join(str(w) for w in HTML_SRCSET_WIDTHS)}px 렌디션을 넣습니다.",
+            )
+            animated_webp = st.checkbox(
+                "움직이는 GIF/WEBP는 HTML에서도 움직이게(애니메이션 WebP)",
+                value=False,
+                key="animated_webp",
+                disabled=not html_output,
+                help="웹용 HTML의 렌디션만 애니메이션 WebP로 만듭니다. 긴 JPG/PSD에는 첫 프레임이 들어갑니다.",
+            )
+            strip_encode = st.checkbox(
+                "긴 JPG 스트립 병렬 인코딩",
+                value=False,
+                key="strip_encode",
+                help="긴 JPG를 가로 띠로 나눠 동시에 인코딩합니다. 결과는 일반 JPG와 같게 보이며 파일이 조금 커질 수 있습니다. (웹용 progressive는 적용 안 됨)",
+            )
+            extra_widths = st.multiselect(
+                "추가 폭 긴 JPG (PSD는 900px 유지)",
+                options=EXTRA_WIDTH_OPTIONS,
+                default=[],
+                format_func=lambda w: f"{w}px",
+                key="extra_widths",
+            )
 
         # 3) Reorder / delete
         ms_section("3) 순서 변경 / 삭제")
-        items: List[ImgItem] = st.session_state[STATE_ITEMS]
+        _render_item_list()
 
-        if not items:
-            st.info("업로드된 이미지가 없습니다.")
-        else:
-            for i, it in enumerate(items):
-                # ✅ 마지막 칸(삭제) 폭 약간 키움 → '삭제' 세로 줄바꿈 방지
-                row = st.columns([0.14, 0.54, 0.10, 0.10, 0.12])
-                with row[0]:
-                    st.image(_make_thumb(it.pil), use_column_width=True)
-                with row[1]:
-                    short = it.name if len(it.name) <= 44 else (it.name[:41] + "…")
-                    st.markdown(f"**{i+1}. {short}**  \n원본: {it.pil.size[0]}×{it.pil.size[1]}")
-                with row[2]:
-                    up = st.button("▲", key=f"up_{i}", disabled=(i == 0), use_container_width=True)
-                with row[3]:
-                    down = st.button("▼", key=f"down_{i}", disabled=(i == len(items) - 1), use_container_width=True)
-                with row[4]:
-                    delete = st.button("삭제", key=f"del_{i}", use_container_width=True)
-
-                if up:
-                    items[i - 1], items[i] = items[i], items[i - 1]
-                    st.session_state[STATE_ITEMS] = items
-                    st.rerun()
-                if down:
-                    items[i + 1], items[i] = items[i], items[i + 1]
-                    st.session_state[STATE_ITEMS] = items
-                    st.rerun()
-                if delete:
-                    removed = items.pop(i)
-                    st.session_state[STATE_ITEMS] = items
-                    seen = st.session_state[STATE_SEEN]
-                    if removed.sha1 in seen:
-                        seen.remove(removed.sha1)
-                    st.session_state[STATE_SEEN] = seen
-                    st.rerun()
+        _render_project_box()
 
         st.divider()
 
@@ -1016,8 +3281,25 @@ def main():
                 _reset_all()
                 st.rerun()
 
-        if gen:
-            jpg_bytes, zip_bytes, meta = _build_outputs(base_name, int(top_pad), int(bottom_pad), int(gap))
+        if gen and not st.session_state[STATE_ITEMS]:
+            st.warning("생성할 이미지가 없습니다.")
+        elif gen:
+            jpg_bytes, zip_bytes, meta = _build_outputs(
+                base_name,
+                int(top_pad),
+                int(bottom_pad),
+                int(gap),
+                long_profile=long_profile,
+                parts_profile=parts_profile,
+                html_output=html_output,
+                widths=[CANVAS_WIDTH] + list(extra_widths),
+                strip_encode=strip_encode,
+                animated_webp=animated_webp,
+            )
+            prev_manifest = _prev_manifest(base_name, _user_namespace())
+            st.session_state[STATE_LAST_DELTA] = (
+                _delta_zip(zip_bytes, meta["manifest"], prev_manifest) if prev_manifest else None
+            )
             st.session_state[STATE_LAST_PREVIEW] = jpg_bytes
             st.session_state[STATE_LAST_ZIP] = zip_bytes
             st.session_state[STATE_LAST_META] = meta
@@ -1035,6 +3317,20 @@ def main():
                 f"총 {meta['count']}장 · 최종 높이 {meta['total_height']:,}px · "
                 f"상단 {meta['top']} / 하단 {meta['bottom']} / 간격 {meta['gap']}px · PSD: {parts_txt}"
             )
+            if meta.get("passthrough"):
+                st.caption(f"원본 그대로 사용(재인코딩 없음): {meta['passthrough']}장")
+            for ws in meta.get("widths_skipped", []):
+                st.warning(
+                    f"{ws['width']}px 긴 JPG는 만들지 않았습니다: 높이 약 {ws['height']:,}px로 "
+                    f"JPG 최대 {JPEG_MAX_DIM:,}px를 넘습니다. (이미지 수를 줄이거나 작은 폭을 사용하세요)"
+                )
+            for wu in meta.get("widths_upscaled", []):
+                st.warning(f"{wu['width']}px 긴 JPG: 원본 폭이 {wu['width']}px보다 좁은 사진 {wu['count']}장은 확대되어 흐릿할 수 있습니다.")
+            if meta.get("animated_missing"):
+                st.warning(
+                    f"원본이 저장소에서 정리되어 움직이는 WebP 대신 첫 프레임 JPG로 넣었습니다: {', '.join(meta['animated_missing'])} "
+                    "(해당 파일을 다시 업로드하세요)"
+                )
             st.image(jpg_bytes, use_column_width=True)
 
             ms_section("다운로드")
@@ -1045,13 +3341,39 @@ def main():
                 mime="image/jpeg",
                 use_container_width=True,
             )
+            for wo in meta.get("width_outputs", []):
+                st.download_button(
+                    f"JPG {wo['width']}px 다운로드 ({wo['bytes'] / (1024 * 1024):.1f}MB)",
+                    data=_zip_member(zip_bytes, wo["file"]),
+                    file_name=wo["file"],
+                    mime="image/jpeg",
+                    use_container_width=True,
+                    key=f"dl_width_{wo['width']}",
+                )
             st.download_button(
                 "ZIP(PSD용 JSX + images 포함) 다운로드",
                 data=zip_bytes,
                 file_name=f"{base_name}_bundle.zip",
                 mime="application/zip",
                 use_container_width=True,
+                on_click=_remember_download_cb,
+                args=(meta.get("base_name", base_name), meta["manifest"]),
             )
+            delta = st.session_state.get(STATE_LAST_DELTA)
+            if delta:
+                delta_bytes, info = delta
+                st.download_button(
+                    f"변경분만 ZIP 다운로드 ({info['changed']}/{info['total']}개 변경"
+                    + (f", {info['removed']}개 삭제" if info["removed"] else "")
+                    + ")",
+                    data=delta_bytes,
+                    file_name=f"{base_name}_bundle_delta.zip",
+                    mime="application/zip",
+                    use_container_width=True,
+                    on_click=_remember_download_cb,
+                    args=(meta.get("base_name", base_name), meta["manifest"]),
+                )
+                st.caption("직전 빌드 폴더에 덮어쓰기로 압축 해제하세요. (삭제 목록: REMOVED.txt)")
         else:
             st.info("아직 생성된 결과가 없습니다. 왼쪽에서 생성 버튼을 눌러주세요.")
 
@@ -0,0 +1,234 @@
+"""
+프로세스 풀 렌더 백엔드 (선택: MISHARP_RENDER_BACKEND=process)
+
+- 900px 리사이즈 / 긴 JPG 합성+인코딩 / 파트 이미지 인코딩을 별도 프로세스에서 실행
+- 픽셀은 multiprocessing.shared_memory로 전달 (PIL.Image를 pickle하지 않음, 결과는 JPEG bytes만 반환)
+- 공유 메모리는 항상 부모(app)가 만들고 지움 → 작업 프로세스는 이름으로 붙기만
+- 풀은 프로세스당 1개, 처음 사용할 때 spawn 후 계속 재사용 (warm)
+- spawn 자식이 import할 수 있도록 작업 함수는 streamlit을 쓰지 않는 이 모듈에 둠
+  (spawn 규칙상 자식은 실행 중인 스크립트를 __mp_main__으로 한 번 import → main()은 실행되지 않음)
+"""
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+# (shm 이름, mode, w, h)
+ShmSpec = Tuple[str, str, int, int]
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+# =========================================================
+# WORKER (작업 프로세스 쪽)
+# =========================================================
+def _warm() -> None:
+    # 첫 작업 전에 JPEG 인코더/리샘플러 로드
+    import io
+
+    im = Image.new("RGB", (16, 16), (255, 255, 255))
+    im.resize((8, 8), resample=Image.Resampling.LANCZOS).save(io.BytesIO(), format="JPEG")
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # 3.13+는 track=False (작업 프로세스가 부모 소유 세그먼트를 정리하려 들지 않게)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _view(shm: shared_memory.SharedMemory, spec: ShmSpec) -> Image.Image:
+    _, mode, w, h = spec
+    return Image.frombuffer(mode, (w, h), shm.buf, "raw", mode, 0, 1)
+
+
+def _resize_task(src: ShmSpec, dst: ShmSpec) -> None:
+    s = _attach(src[0])
+    d = _attach(dst[0])
+    try:
+        im = _view(s, src)
+        out = im.resize((dst[2], dst[3]), resample=Image.Resampling.LANCZOS)
+        if out.mode != "RGB":
+            out = out.convert("RGB")
+        data = out.tobytes()
+        d.buf[: len(data)] = data
+        del im
+    finally:
+        s.close()
+        d.close()
+
+
+def _compose_encode_task(specs: List[ShmSpec], top_pad: int, bottom_pad: int, gap: int, width: int, jpeg_opts: dict) -> bytes:
+    import io
+
+    shms = [_attach(sp[0]) for sp in specs]
+    try:
+        heights = [sp[3] for sp in specs]
+        total_h = top_pad + bottom_pad + sum(heights) + gap * (len(specs) - 1)
+        canvas = Image.new("RGB", (width, total_h), color=(255, 255, 255))
+        y = top_pad
+        for idx, (shm, sp) in enumerate(zip(shms, specs)):
+            im = _view(shm, sp)
+            canvas.paste(im, (0, y))
+            del im
+            y += sp[3]
+            if idx != len(specs) - 1:
+                y += gap
+        out = io.BytesIO()
+        canvas.save(out, format="JPEG", **jpeg_opts)
+        return out.getvalue()
+    finally:
+        for shm in shms:
+            shm.close()
+
+
+def _encode_task(spec: ShmSpec, jpeg_opts: dict) -> bytes:
+    import io
+
+    shm = _attach(spec[0])
+    try:
+        im = _view(shm, spec)
+        out = io.BytesIO()
+        im.save(out, format="JPEG", **jpeg_opts)
+        del im
+        return out.getvalue()
+    finally:
+        shm.close()
+
+
+# =========================================================
+# PARENT (app 쪽)
+# =========================================================
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    프로세스당 1개 풀 (spawn: 스레드가 많은 streamlit 서버에서 fork 대신 안전한 방식)
+    작업자 수가 바뀌면 새로 만듦.
+    """
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=mp.get_context("spawn"), initializer=_warm)
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def warm_up(workers: int) -> None:
+    # 작업자를 미리 띄워 둠 (첫 생성 때 spawn 시간이 들지 않게)
+    pool = get_pool(workers)
+    for f in [pool.submit(_warm) for _ in range(max(1, workers))]:
+        f.result()
+
+
+def discard() -> None:
+    # 작업 프로세스가 죽은 풀(BrokenProcessPool)은 기다리지 않고 버림 → 다음 get_pool 에서 새로 만듦
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+        _POOL_WORKERS = 0
+
+
+def shutdown() -> None:
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=True)
+        _POOL = None
+        _POOL_WORKERS = 0
+
+
+class ShmArena:
+    """
+    한 번의 생성 동안 만든 공유 메모리 모음 → with 블록이 끝나면 모두 close + unlink
+    """
+
+    def __init__(self):
+        self._segments: List[shared_memory.SharedMemory] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for shm in self._segments:
+            try:
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._segments = []
+
+    def alloc(self, mode: str, w: int, h: int) -> Tuple[shared_memory.SharedMemory, ShmSpec]:
+        nbytes = max(1, w * h * len(mode))
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._segments.append(shm)
+        return shm, (shm.name, mode, w, h)
+
+    def put(self, im: Image.Image) -> ShmSpec:
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGB")
+        data = im.tobytes()
+        shm, spec = self.alloc(im.mode, im.size[0], im.size[1])
+        shm.buf[: len(data)] = data
+        return spec
+
+    def get(self, spec: ShmSpec) -> Image.Image:
+        # 세그먼트는 곧 지워지므로 복사본으로 반환
+        shm = next(s for s in self._segments if s.name == spec[0])
+        return Image.frombuffer(spec[1], (spec[2], spec[3]), shm.buf, "raw", spec[1], 0, 1).copy()
+
+
+def resize_many(images: Sequence[Image.Image], sizes: Sequence[Tuple[int, int]], workers: int) -> List[Image.Image]:
+    """
+    이미지 여러 장을 작업 프로세스에서 병렬 리사이즈 (LANCZOS → RGB, app._fit_to_width_900과 같은 결과)
+    """
+    if not images:
+        return []
+    pool = get_pool(workers)
+    with ShmArena() as arena:
+        jobs = []
+        for im, (w, h) in zip(images, sizes):
+            src = arena.put(im)
+            _, dst = arena.alloc("RGB", w, h)
+            jobs.append((dst, pool.submit(_resize_task, src, dst)))
+        out = []
+        for dst, fut in jobs:
+            fut.result()
+            out.append(arena.get(dst))
+        return out
+
+
+def encode_bundle(
+    resized: Sequence[Image.Image],
+    top_pad: int,
+    bottom_pad: int,
+    gap: int,
+    width: int,
+    long_opts: dict,
+    part_opts: dict,
+    encode_mask: Sequence[bool],
+    workers: int,
+) -> Tuple[bytes, List[Optional[bytes]]]:
+    """
+    리사이즈된 이미지를 공유 메모리에 1번만 올리고
+    긴 JPG(합성+인코딩) 1건 + 파트 img_XX.jpg 인코딩(encode_mask=True인 것만)을 동시에 실행
+    → (긴 JPG bytes, [파트 JPG bytes 또는 None])
+    """
+    pool = get_pool(workers)
+    with ShmArena() as arena:
+        specs = [arena.put(im) for im in resized]
+        fut_long = pool.submit(_compose_encode_task, specs, top_pad, bottom_pad, gap, width, long_opts)
+        fut_parts: Dict[int, object] = {
+            i: pool.submit(_encode_task, sp, part_opts) for i, (sp, need) in enumerate(zip(specs, encode_mask)) if need
+        }
+        long_bytes = fut_long.result()
+        parts = [fut_parts[i].result() if i in fut_parts else None for i in range(len(specs))]
+        return long_bytes, parts
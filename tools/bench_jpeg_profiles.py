@@ -0,0 +1,90 @@
+"""
+JPEG 인코딩 프로필 벤치마크 (인코딩 시간 vs 파일 크기)
+
+사용:
+  python tools/bench_jpeg_profiles.py                     # 합성 긴 캔버스(900×20000)
+  python tools/bench_jpeg_profiles.py --height 60000
+  python tools/bench_jpeg_profiles.py a.jpg b.png ...     # 실제 이미지로 긴 캔버스 구성
+  python tools/bench_jpeg_profiles.py --strips 4          # + 스트립 병렬 인코딩(restart marker) 행 추가
+
+- 스트립 행의 시간은 합성 포함 (전체 캔버스 없이 스트립별 합성+인코딩), 결과가 1패스와 픽셀 동일한지도 확인
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app  # noqa: E402
+from synth_images import synth_image_bytes  # noqa: E402
+
+
+def build_resized(paths, height: int):
+    if paths:
+        resized = []
+        for p in paths:
+            with open(p, "rb") as f:
+                resized.append(app._fit_to_width_900(app._open_image_any(f.read())))
+        return resized
+
+    n = max(1, height // 1500)
+    return [app._open_image_any(synth_image_bytes(app.CANVAS_WIDTH, 1200, "jpg", "RGB", i)).convert("RGB") for i in range(n)]
+
+
+def decode_pixels(data: bytes) -> bytes:
+    from PIL import Image
+
+    im = Image.open(io.BytesIO(data))
+    im.load()
+    return im.tobytes()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JPEG 프로필별 인코딩 시간/크기 비교")
+    ap.add_argument("images", nargs="*")
+    ap.add_argument("--height", type=int, default=20000, help="합성 캔버스 높이(px)")
+    ap.add_argument("--repeat", type=int, default=3, help="프로필당 반복 횟수 (최솟값 사용)")
+    ap.add_argument("--strips", type=int, default=0, help="스트립 인코딩 작업 수 (0=생략)")
+    args = ap.parse_args()
+
+    pads = (app.DEFAULT_TOP_PAD, app.DEFAULT_BOTTOM_PAD, app.DEFAULT_GAP)
+    resized = build_resized(args.images, args.height)
+    canvas = app._compose_long_jpg(resized, *pads)
+    print(f"\n=== JPEG profiles · canvas {canvas.size[0]}×{canvas.size[1]} ===")
+    print(f"{'profile':<14}{'encode(ms)':>12}{'size(KB)':>12}{'vs final':>10}  options")
+
+    base_size = None
+    for name in ["final", "progressive", "intermediate", "draft"]:
+        best = None
+        size = 0
+        for _ in range(max(1, args.repeat)):
+            t = time.perf_counter()
+            size = len(app._save_jpg_bytes(canvas, name))
+            dt = (time.perf_counter() - t) * 1000.0
+            best = dt if best is None else min(best, dt)
+        if base_size is None:
+            base_size = size
+        print(f"{name:<14}{best:>12.0f}{size / 1024:>12,.0f}{size / base_size:>9.2f}x  {app.JPEG_PROFILES[name]}")
+
+    if args.strips <= 0:
+        return
+    print(f"\n=== 스트립 병렬 인코딩 · 작업 {args.strips}개 (CPU {os.cpu_count()}) ===")
+    print(f"{'profile':<20}{'encode(ms)':>12}{'size(KB)':>12}{'vs final':>10}  1패스와 픽셀 동일")
+    for name in ["final", "intermediate", "draft"]:
+        best = None
+        data = b""
+        for _ in range(max(1, args.repeat)):
+            t = time.perf_counter()
+            data = app._encode_long_strips(resized, *pads, profile=name, workers=args.strips)
+            dt = (time.perf_counter() - t) * 1000.0
+            best = dt if best is None else min(best, dt)
+        same = decode_pixels(data) == decode_pixels(app._save_jpg_bytes(canvas, name))
+        print(f"{name + '+strips':<20}{best:>12.0f}{len(data) / 1024:>12,.0f}{len(data) / base_size:>9.2f}x  {'예' if same else '아니오'}")
+
+
+if __name__ == "__main__":
+    main()
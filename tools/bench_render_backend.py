@@ -0,0 +1,105 @@
+"""
+렌더 백엔드 벤치마크: thread(현재 프로세스) vs process(render_pool, 공유 메모리)
+
+사용:
+  python tools/bench_render_backend.py                     # 20장 / 50장, 1200×1600 합성 JPEG
+  python tools/bench_render_backend.py --sizes 20 50 --repeat 3 --procs 4
+  python tools/bench_render_backend.py --src-w 3000 --src-h 4000
+
+- 리사이즈 캐시/에셋 저장소 없이 매번 전체 생성 (resize 단계까지 포함해 비교)
+- 상품당 최대 MAX_TOTAL_IMAGES장 → 그보다 많으면 상품 여러 개로 나눠 배치 생성(_build_batch)으로 측정
+  (단계별 값은 상품별 합계, total은 배치 전체 경과 시간)
+- process는 풀을 먼저 warm_up 한 뒤 측정 (spawn 시간은 따로 표시)
+- 같은 입력이면 두 백엔드의 결과물(통합 ZIP 안 JPG/번들 ZIP)이 바이트 단위로 같은지도 확인
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 벤치 실행이 build_trace.jsonl에 기록되지 않도록 (app import 전에)
+os.environ["MISHARP_TRACE_LOG"] = ""
+
+import app  # noqa: E402
+import render_pool  # noqa: E402
+from synth_images import synth_image_bytes  # noqa: E402
+
+# 합성 이미지가 에셋 저장소에 쌓이지 않도록
+app.ASSET_STORE_DIR = ""
+
+STAGES = ["resize", "compose", "encode_long", "encode_parts", "zip", "total"]
+
+
+def make_items(n: int, w: int, h: int):
+    items = []
+    for i in range(n):
+        raw = synth_image_bytes(w, h, "jpg", "RGB", i)
+        pil = app._open_image_any(raw)
+        pil.load()
+        items.append(app.ImgItem(name=f"bench_{i + 1:02d}.jpg", bytes_data=raw, pil=pil, ext="jpg", sha1=app._sha1(raw)))
+    return items
+
+
+def make_products(items):
+    k = app.MAX_TOTAL_IMAGES
+    return [{"name": f"bench{i // k + 1}", "items": items[i:i + k], "enabled": True} for i in range(0, len(items), k)]
+
+
+def run(products, backend: str, repeat: int):
+    app.RENDER_BACKEND = backend
+    best = None
+    out = None
+    for _ in range(max(1, repeat)):
+        zip_bytes, meta = app._build_batch(products, app.DEFAULT_TOP_PAD, app.DEFAULT_BOTTOM_PAD, app.DEFAULT_GAP)
+        tm = {s: sum(m["timings_ms"].get(s, 0.0) for m in meta["per_product"]) for s in STAGES}
+        tm["total"] = meta["elapsed_s"] * 1000.0
+        if best is None or tm["total"] < best["total"]:
+            best, out = tm, zip_bytes
+    return best, zip_contents(out)
+
+
+def zip_contents(zip_bytes: bytes) -> dict:
+    # 통합 ZIP은 항목 시각이 매번 달라서 항목별 내용으로 비교
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zf:
+        return {n: zf.read(n) for n in zf.namelist()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="thread vs process 렌더 백엔드 비교")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20, 50], help="이미지 장수 목록")
+    ap.add_argument("--src-w", type=int, default=1200)
+    ap.add_argument("--src-h", type=int, default=1600)
+    ap.add_argument("--repeat", type=int, default=2, help="반복 횟수 (최솟값 사용)")
+    ap.add_argument("--procs", type=int, default=app.RENDER_PROCESSES, help="작업 프로세스 수")
+    args = ap.parse_args()
+
+    app.RENDER_PROCESSES = args.procs
+    t = time.perf_counter()
+    render_pool.warm_up(args.procs)
+    print(f"\n작업 프로세스 {args.procs}개 spawn + warm: {(time.perf_counter() - t) * 1000:,.0f} ms (CPU {os.cpu_count()})")
+
+    for n in args.sizes:
+        products = make_products(make_items(n, args.src_w, args.src_h))
+        print(f"\n=== {n}장 (상품 {len(products)}개) · 원본 {args.src_w}×{args.src_h} ===")
+        print(f"{'backend':<9}" + "".join(f"{s:>14}" for s in STAGES))
+        results = {}
+        for backend in ["thread", "process"]:
+            tm, contents = run(products, backend, args.repeat)
+            results[backend] = (tm, contents)
+            print(f"{backend:<9}" + "".join(f"{tm.get(s, 0.0):>14,.0f}" for s in STAGES))
+        t_thr = results["thread"][0]["total"]
+        t_proc = results["process"][0]["total"]
+        same = results["thread"][1] == results["process"][1]
+        print(f"→ process / thread = {t_proc / t_thr:.2f}x · 결과물 동일: {'예' if same else '아니오'}")
+
+    render_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
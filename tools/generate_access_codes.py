@@ -1,21 +1,217 @@
-import secrets
-import hashlib
+"""
+접속 코드 생성기 (MSPGV3-XXXX-XXXX-XXXX)
+
+사용:
+  python tools/generate_access_codes.py                       # 기존 대화형 (label:hash)
+  python tools/generate_access_codes.py -n 300 --label contractor --role staff --expires 2026-12-31
+  python tools/generate_access_codes.py -n 50 --label md --merge .streamlit/secrets.toml
+  python tools/generate_access_codes.py --label contractor --rotate --merge .streamlit/secrets.toml --write-back
+
+인자 모드:
+- "label|role|expires|hash" 포맷 (app.py _parse_entry_line 권장 포맷)
+- CSV(원문 코드) + TOML(Secrets 붙여넣기용)을 한 줄씩 바로 기록 → 10만 개도 수 초
+- --merge: 기존 secrets 파일의 ACCESS_CODE_ENTRIES / ACCESS_CODE_HASHES / REVOKED_LABELS 를 이어받음
+  (라벨 번호는 기존 최대 번호 다음부터, 기존 label:hash 는 label|staff||hash 로 변환)
+  --merge 결과 TOML은 secrets 파일 전체 (다른 설정값 그대로 유지)
+- --rotate: --merge 파일에서 --label 로 시작하는 라벨을 같은 라벨로 새 코드 재발급 (기존 코드 즉시 무효)
+  role/expires 는 기존 값 유지 (--role / --expires 를 명시한 경우만 변경)
+"""
+import argparse
 import csv
+import hashlib
+import json
+import os
+import re
+import secrets
+import sys
 from datetime import datetime
 
 PREFIX = "MSPGV3"  # 고정
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+ROLES = ("staff", "admin")
+AUTH_KEYS = ("ACCESS_CODE_ENTRIES", "ACCESS_CODE_HASHES", "REVOKED_LABELS")
+_LABEL_RE = re.compile(r"^[A-Za-z0-9_.\-]+$")
+_KEY_LINE_RE = re.compile(r"^\s*(" + "|".join(AUTH_KEYS) + r")\s*=")
+_TABLE_LINE_RE = re.compile(r"^\s*\[")
+
 
 def sha256(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
+
 def make_code() -> str:
     # MSPGV3-XXXX-XXXX-XXXX (대문자/숫자)
-    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-    raw = "".join(secrets.choice(alphabet) for _ in range(12))
+    # 난수 1번(36^12 범위) → 12자리 36진수 (secrets.choice 12번보다 훨씬 빠름, 분포 동일)
+    n = secrets.randbelow(36 ** 12)
+    chars = []
+    for _ in range(12):
+        n, r = divmod(n, 36)
+        chars.append(ALPHABET[r])
+    raw = "".join(chars)
     a, b, c = raw[:4], raw[4:8], raw[8:12]
     return f"{PREFIX}-{a}-{b}-{c}"
 
-def main():
+
+def _entry_line(label: str, role: str, expires: str, h: str) -> str:
+    return f"{label}|{role}|{expires}|{h}"
+
+
+def _toml_str(s: str) -> str:
+    # TOML basic string (" \\ 제어문자 이스케이프 — JSON 문자열 이스케이프는 TOML 과 호환)
+    return json.dumps(s, ensure_ascii=False)
+
+
+def _split_entry(line: str):
+    # "label|role|expires|hash" → (label, role, expires, hash)
+    label, role, expires, h = line.split("|", 3)
+    return label, role, expires, h
+
+
+def _label_no(label: str, base: str) -> int:
+    # "contractor012" → 12 (base 뒤가 숫자가 아니면 -1)
+    rest = label[len(base):] if label.startswith(base) else ""
+    return int(rest) if rest.isdigit() else -1
+
+
+def _check_expires(s: str) -> str:
+    # app.py _parse_expires 와 같은 포맷만 허용: "" / YYYY-MM-DD / YYYY-MM-DDTHH:MM
+    s = (s or "").strip()
+    if not s:
+        return ""
+    try:
+        datetime.fromisoformat(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expires 포맷 오류: {s} (YYYY-MM-DD 또는 YYYY-MM-DDTHH:MM)")
+    if "T" not in s and len(s) != 10:
+        raise argparse.ArgumentTypeError(f"expires 포맷 오류: {s} (YYYY-MM-DD 또는 YYYY-MM-DDTHH:MM)")
+    return s
+
+
+def _check_label(s: str) -> str:
+    if not _LABEL_RE.match(s or ""):
+        raise argparse.ArgumentTypeError("label 은 영문/숫자/_ . - 만 사용할 수 있습니다.")
+    return s
+
+
+def load_secrets(path: str):
+    """
+    기존 secrets 파일 → (entries dict(label→line, 순서 유지), revoked 목록, 원문 텍스트)
+    ACCESS_CODE_ENTRIES 가 없을 때만 ACCESS_CODE_HASHES(label:hash)를 사용 (app.py 와 같은 우선순위)
+    """
+    import tomllib
+
+    with open(path, "rb") as f:
+        text = f.read().decode("utf-8")
+    doc = tomllib.loads(text)
+
+    entries = {}
+    for line in doc.get("ACCESS_CODE_ENTRIES") or []:
+        parts = [p.strip() for p in str(line).split("|")]
+        if len(parts) >= 4 and parts[0] and parts[3]:
+            entries[parts[0]] = _entry_line(parts[0], parts[1] or "staff", parts[2], parts[3])
+    if not entries:
+        for line in doc.get("ACCESS_CODE_HASHES") or []:
+            if ":" in str(line):
+                label, h = (x.strip() for x in str(line).split(":", 1))
+                if label and h:
+                    entries[label] = _entry_line(label, "staff", "", h)
+
+    revoked = [str(x).strip() for x in doc.get("REVOKED_LABELS") or [] if str(x).strip()]
+    return entries, revoked, text
+
+
+def _strip_auth_keys(text: str):
+    """
+    secrets 원문에서 인증 키 3개(여러 줄 배열 포함)를 지운 줄 목록 + 새 블록을 넣을 위치.
+    위치: 지운 첫 키 자리 → 없으면 첫 [table] 앞(최상위 키여야 하므로) → 없으면 맨 끝
+    """
+    out = []
+    insert_at = None
+    depth = 0
+    skipping = False
+    for line in text.splitlines():
+        if skipping:
+            depth += line.count("[") - line.count("]")
+            if depth <= 0:
+                skipping = False
+            continue
+        if _KEY_LINE_RE.match(line):
+            if insert_at is None:
+                insert_at = len(out)
+            value = line.split("=", 1)[1]
+            depth = value.count("[") - value.count("]")
+            skipping = depth > 0
+            continue
+        out.append(line)
+    if insert_at is None:
+        insert_at = next((i for i, line in enumerate(out) if _TABLE_LINE_RE.match(line)), len(out))
+    return out, insert_at
+
+
+def run_cli(args) -> None:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    csv_path = args.csv or f"access_codes_{ts}.csv"
+    toml_path = args.toml or (args.merge if args.write_back else f"access_codes_{ts}.toml")
+
+    existing, revoked, text = ({}, [], "")
+    if args.merge:
+        existing, revoked, text = load_secrets(args.merge)
+
+    # 재발급 대상: 기존 라벨 중 --label 로 시작하는 것 (같은 라벨 유지 → REVOKED_LABELS 불필요)
+    rotate = [label for label in existing if args.rotate and _label_no(label, args.label) >= 0]
+    start = max([args.start - 1] + [_label_no(label, args.label) for label in existing])
+    width = max(2, len(str(start + args.count)))
+    new_labels = [f"{args.label}{i:0{width}d}" for i in range(start + 1, start + args.count + 1)]
+    if not rotate and not new_labels:
+        print("생성할 코드가 없습니다. (--count 또는 --rotate 확인)")
+        return
+
+    toml_tmp = f"{toml_path}.{os.getpid()}.tmp"
+    issued = 0
+    with open(csv_path, "w", newline="", encoding="utf-8-sig") as fc, open(toml_tmp, "w", encoding="utf-8") as ft:
+        w = csv.writer(fc)
+        w.writerow(["label", "role", "expires", "access_code_plain", "sha256_hash"])
+
+        lines, insert_at = _strip_auth_keys(text) if args.merge else ([], 0)
+        for line in lines[:insert_at]:
+            ft.write(line + "\n")
+
+        ft.write("ACCESS_CODE_ENTRIES = [\n")
+        rotate_set = set(rotate)
+        for label, line in existing.items():
+            if label not in rotate_set:
+                ft.write(f"  {_toml_str(line)},\n")
+        for label in rotate + new_labels:
+            # 재발급은 기존 role/expires 유지 (--role / --expires 를 준 경우만 변경)
+            _, old_role, old_expires, _ = _split_entry(existing[label]) if label in rotate_set else ("", "staff", "", "")
+            role = args.role if args.role is not None else old_role
+            expires = args.expires if args.expires is not None else old_expires
+            code = make_code()
+            h = sha256(code)
+            w.writerow([label, role, expires, code, h])
+            ft.write(f"  {_toml_str(_entry_line(label, role, expires, h))},\n")
+            issued += 1
+        ft.write("]\n")
+        ft.write("REVOKED_LABELS = [" + ", ".join(_toml_str(x) for x in revoked) + "]  # 차단할 label이 생기면 여기에 추가\n")
+
+        for line in lines[insert_at:]:
+            ft.write(line + "\n")
+
+    if args.write_back and args.merge and os.path.exists(args.merge):
+        os.replace(args.merge, args.merge + ".bak")
+    os.replace(toml_tmp, toml_path)
+
+    print(f"✅ 코드 {issued:,}개 발급 (신규 {len(new_labels):,} / 재발급 {len(rotate):,}, 기존 유지 {len(existing) - len(rotate):,})")
+    print("✅ CSV 저장:", csv_path)
+    if args.merge:
+        print("✅ Secrets(병합본) 저장:", toml_path, "(기존 파일 → .bak)" if args.write_back else "")
+    else:
+        print("✅ Secrets 붙여넣기용 TOML:", toml_path)
+        print("   (기존 ACCESS_CODE_HASHES 사용 중이면 --merge 로 합쳐야 기존 코드가 유지됩니다)")
+    print("- CSV의 access_code_plain(원문 코드)만 전달하세요. CSV는 전달 후 삭제 권장.")
+
+
+def interactive():
     print("\n=== Access Code Generator (MSPGV3-XXXX-XXXX-XXXX) ===")
     n = int(input("몇 개 생성할까요? (예: 5) : ").strip() or "5")
     label_base = input("라벨 베이스 (예: staff / md / cs / order_20260209) : ").strip() or "staff"
@@ -31,7 +227,7 @@ def main():
         code = make_code()
         h = sha256(code)
         rows.append([label, code, h])
-        secrets_lines.append(f'  "{label}:{h}",')
+        secrets_lines.append(f"  {_toml_str(f'{label}:{h}')},")
 
     with open(csv_name, "w", newline="", encoding="utf-8-sig") as f:
         w = csv.writer(f)
@@ -52,5 +248,32 @@ def main():
     print("\n[차단(삭제) 방법]")
     print('- Secrets에서 REVOKED_LABELS = ["staff02"] 처럼 label만 추가하면 즉시 차단됩니다.')
 
+
+def main():
+    if len(sys.argv) == 1:
+        interactive()
+        return
+
+    ap = argparse.ArgumentParser(description="접속 코드 일괄 생성 (label|role|expires|hash)")
+    ap.add_argument("-n", "--count", type=int, default=0, help="새로 만들 코드 수")
+    ap.add_argument("--label", type=_check_label, default="staff", help="라벨 베이스 (예: contractor → contractor001 …)")
+    ap.add_argument("--role", choices=ROLES, default=None, help="기본 staff (--rotate 는 생략 시 기존 role 유지)")
+    ap.add_argument("--expires", type=_check_expires, default=None,
+                    help="만료일 YYYY-MM-DD 또는 YYYY-MM-DDTHH:MM (KST, 생략=만료 없음, --rotate 는 생략 시 기존 값 유지)")
+    ap.add_argument("--start", type=int, default=1, help="라벨 시작 번호 (--merge 시 기존 최대 번호 다음부터)")
+    ap.add_argument("--csv", default="", help="CSV 경로 (기본 access_codes_<시각>.csv)")
+    ap.add_argument("--toml", default="", help="TOML 경로 (기본 access_codes_<시각>.toml)")
+    ap.add_argument("--merge", default="", help="기존 secrets.toml 과 병합")
+    ap.add_argument("--rotate", action="store_true", help="--merge 파일의 --label 라벨들을 새 코드로 재발급")
+    ap.add_argument("--write-back", action="store_true", help="병합 결과로 --merge 파일을 교체 (기존 파일은 .bak)")
+    args = ap.parse_args()
+
+    if args.count < 0:
+        ap.error("--count 는 0 이상이어야 합니다.")
+    if (args.rotate or args.write_back) and not args.merge:
+        ap.error("--rotate / --write-back 은 --merge 와 함께 사용하세요.")
+    run_cli(args)
+
+
 if __name__ == "__main__":
     main()
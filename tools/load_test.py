@@ -0,0 +1,425 @@
+"""
+동시 접속 부하 테스트 (실제 streamlit 서버 + headless 웹소켓 클라이언트, 리눅스 1대에서 실행)
+
+사용:
+  python tools/load_test.py                          # 5세션, 세션당 8장
+  python tools/load_test.py --sessions 10 --images 20 --ramp 0.5
+  MISHARP_RENDER_BACKEND=process python tools/load_test.py --sessions 8
+
+세션마다: login → upload → add → reorder → generate → download
+- 임시 폴더에서 서버 실행: .streamlit/secrets.toml(테스트용 코드 1개), 에셋 저장소/트레이스도 임시 폴더
+- 브라우저와 같은 프로토콜(BackMsg/ForwardMsg)로 위젯 조작, 업로드는 /_stcore/upload_file PUT,
+  다운로드는 download_button의 /media URL GET
+- 출력: 단계별 p50/p95/max(ms), 처리량(세션/분), 서버 최대 RSS(작업 프로세스 포함 합계, VmHWM)
+- AppTest는 실행마다 전역 Runtime/secrets를 바꿔서 한 프로세스 안 동시 세션 흉내에 쓸 수 없음 → 실제 서버 사용
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 부하 테스트 전용 코드 (임시 secrets에만 기록)
+TEST_CODE = "MSPGV3-LOAD-TEST-0001"
+STEPS = ["open", "login", "upload", "add", "reorder", "generate", "download"]
+WIDGET_TYPES = {
+    "button",
+    "download_button",
+    "checkbox",
+    "file_uploader",
+    "number_input",
+    "radio",
+    "selectbox",
+    "slider",
+    "text_input",
+    "multiselect",
+}
+
+
+def pct_stats(samples):
+    # → (p50, p95, min, max) (measure_rerun.py도 사용)
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+    return statistics.median(samples), p95, samples[0], samples[-1]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# =========================================================
+# SERVER
+# =========================================================
+def start_server(workdir: str, port: int) -> subprocess.Popen:
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    code_hash = hashlib.sha256(TEST_CODE.encode("utf-8")).hexdigest()
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+        f.write("AUTH_ENABLED = true\n")
+        f.write(f'ACCESS_CODE_ENTRIES = ["loadtest|staff||{code_hash}"]\n')
+        f.write("LOCK_MAX_FAILS = 1000\n")
+    logo = os.path.join(ROOT, "logo.png")
+    if os.path.exists(logo):
+        shutil.copy(logo, os.path.join(workdir, "logo.png"))
+
+    env = dict(os.environ)
+    env["MISHARP_ASSET_STORE"] = os.path.join(workdir, "store")
+    env["MISHARP_TRACE_LOG"] = os.path.join(workdir, "build_trace.jsonl")
+    cmd = [
+        sys.executable,
+        "-m",
+        "streamlit",
+        "run",
+        APP_PATH,
+        "--server.headless=true",
+        "--server.address=127.0.0.1",
+        f"--server.port={port}",
+        "--server.enableXsrfProtection=false",
+        "--server.fileWatcherType=none",
+        "--browser.gatherUsageStats=false",
+    ]
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=open(os.path.join(workdir, "server.log"), "wb"))
+
+    import urllib.request
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"서버 시작 실패 (로그: {workdir}/server.log)")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("서버 응답 없음 (60초)")
+
+
+def _proc_tree(pid: int):
+    out = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            for c in f.read().split():
+                out.extend(_proc_tree(int(c)))
+    except OSError:
+        pass
+    return out
+
+
+def _status_kb(pid: int, field: str) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class RssSampler:
+    """서버 + 자식(작업 프로세스) RSS 합계를 주기적으로 측정 → 최댓값"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self.hwm_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            pids = _proc_tree(self.pid)
+            self.peak_kb = max(self.peak_kb, sum(_status_kb(p, "VmRSS") for p in pids))
+            self.hwm_kb = max(self.hwm_kb, sum(_status_kb(p, "VmHWM") for p in pids))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# =========================================================
+# HEADLESS CLIENT (세션 1개)
+# =========================================================
+class Session:
+    def __init__(self, port: int, idx: int, timeout: float):
+        self.base = f"127.0.0.1:{port}"
+        self.idx = idx
+        self.timeout = timeout
+        self.ws = None
+        self.session_id = ""
+        self.page_hash = ""
+        self.widgets = {}  # id → (type, proto, fragment_id)
+        self.values = {}  # id → WidgetState (브라우저처럼 매 재실행마다 전체 전송)
+        self.cache = {}  # ForwardMsg hash → msg (ref_hash 해석용)
+        self.timings = {}
+        self.errors = []
+
+    async def _recv(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        data = await asyncio.wait_for(self.ws.read_message(), self.timeout)
+        if data is None:
+            raise RuntimeError("웹소켓 종료")
+        msg = ForwardMsg()
+        msg.ParseFromString(data)
+        if msg.WhichOneof("type") == "ref_hash":
+            msg = self.cache[msg.ref_hash]
+        elif msg.metadata.cacheable:
+            self.cache[msg.hash] = msg
+        return msg
+
+    def _on_msg(self, msg):
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            self.session_id = msg.new_session.initialize.session_id or self.session_id
+            self.page_hash = msg.new_session.page_script_hash
+            if not msg.new_session.fragment_ids_this_run:
+                # fragment 재실행은 해당 영역 위젯만 다시 옴 → 전체 실행일 때만 초기화
+                self.widgets = {}
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            el = msg.delta.new_element
+            et = el.WhichOneof("type")
+            if et in WIDGET_TYPES:
+                w = getattr(el, et)
+                self.widgets[w.id] = (et, w, msg.delta.fragment_id)
+            elif et == "exception":
+                self.errors.append(el.exception.message)
+
+    async def _until_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        while True:
+            msg = await self._recv()
+            self._on_msg(msg)
+            if msg.WhichOneof("type") == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return
+
+    async def rerun(self, triggers=(), fragment_id: str = ""):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        back = BackMsg()
+        cs = back.rerun_script
+        cs.query_string = ""
+        cs.page_script_hash = self.page_hash
+        if fragment_id:
+            cs.fragment_id = fragment_id
+        for ws in list(self.values.values()) + list(triggers):
+            cs.widget_states.widgets.append(ws)
+        await self.ws.write_message(back.SerializeToString(), binary=True)
+        await self._until_finished()
+
+    def find(self, etype: str, label: str = "", key: str = "", prefix: bool = False):
+        for wid, (t, w, frag) in self.widgets.items():
+            if t != etype:
+                continue
+            if key and not wid.endswith("-" + key):
+                continue
+            if label and not (w.label.startswith(label) if prefix else w.label == label):
+                continue
+            return wid, w, frag
+        raise RuntimeError(f"위젯 없음: {etype} {label or key}")
+
+    async def click(self, label: str = "", key: str = "", prefix: bool = False):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        wid, _, frag = self.find("button", label, key, prefix)
+        await self.rerun([WidgetState(id=wid, trigger_value=True)], fragment_id=frag)
+
+    async def _timed(self, step: str, coro):
+        t = time.perf_counter()
+        await coro
+        self.timings[step] = (time.perf_counter() - t) * 1000.0
+
+    # ----- 단계 -----
+    async def open(self):
+        import tornado.websocket
+
+        self.ws = await tornado.websocket.websocket_connect(f"ws://{self.base}/_stcore/stream", max_message_size=1 << 30)
+        await self.rerun()
+
+    async def login(self):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        wid, _, _ = self.find("text_input", "접속 코드")
+        self.values[wid] = WidgetState(id=wid, string_value=TEST_CODE)
+        await self.click("로그인")
+        self.find("file_uploader")  # 메인 화면 도착 확인
+
+    async def upload(self, files):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.Common_pb2 import FileURLs, UploadedFileInfo
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        import tornado.httpclient
+
+        req_id = uuid.uuid4().hex
+        back = BackMsg()
+        back.file_urls_request.request_id = req_id
+        back.file_urls_request.session_id = self.session_id
+        back.file_urls_request.file_names.extend(name for name, _ in files)
+        await self.ws.write_message(back.SerializeToString(), binary=True)
+        while True:
+            msg = await self._recv()
+            self._on_msg(msg)
+            if msg.WhichOneof("type") == "file_urls_response" and msg.file_urls_response.response_id == req_id:
+                urls = list(msg.file_urls_response.file_urls)
+                break
+
+        client = tornado.httpclient.AsyncHTTPClient()
+        infos = []
+        for (name, data), u in zip(files, urls):
+            boundary = uuid.uuid4().hex
+            body = (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+                f"Content-Type: image/jpeg\r\n\r\n"
+            ).encode("utf-8") + data + f"\r\n--{boundary}--\r\n".encode("utf-8")
+            await client.fetch(
+                f"http://{self.base}{u.upload_url}",
+                method="PUT",
+                body=body,
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                request_timeout=self.timeout,
+            )
+            infos.append(
+                UploadedFileInfo(
+                    file_id=u.file_id,
+                    name=name,
+                    size=len(data),
+                    file_urls=FileURLs(file_id=u.file_id, upload_url=u.upload_url, delete_url=u.delete_url),
+                )
+            )
+
+        wid, _, _ = self.find("file_uploader")
+        ws = WidgetState(id=wid)
+        ws.file_uploader_state_value.uploaded_file_info.extend(infos)
+        self.values[wid] = ws
+        await self.rerun()
+
+    async def add(self):
+        await self.click("업로드 파일 목록에 추가")
+        self.find("button", key="down_0")  # 목록 표시 확인
+
+    async def reorder(self):
+        # 첫 이미지를 한 칸 아래로 (목록 fragment만 재실행)
+        await self.click(key="down_0")
+
+    async def generate(self):
+        await self.click("상세페이지 생성하기")
+        self.find("download_button", "ZIP(", prefix=True)
+
+    async def download(self):
+        import tornado.httpclient
+
+        client = tornado.httpclient.AsyncHTTPClient()
+        for label in ("JPG 다운로드", "ZIP("):
+            _, w, _ = self.find("download_button", label, prefix=label.endswith("("))
+            r = await client.fetch(f"http://{self.base}{w.url}", request_timeout=self.timeout)
+            if not r.body:
+                raise RuntimeError(f"빈 다운로드: {label}")
+
+    async def run(self, files):
+        try:
+            await self._timed("open", self.open())
+            await self._timed("login", self.login())
+            await self._timed("upload", self.upload(files))
+            await self._timed("add", self.add())
+            await self._timed("reorder", self.reorder())
+            await self._timed("generate", self.generate())
+            await self._timed("download", self.download())
+        except Exception as e:  # 세션 하나 실패가 전체 측정을 막지 않게
+            self.errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            if self.ws is not None:
+                self.ws.close()
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def make_files(sessions: int, images: int, w: int, h: int):
+    from synth_images import synth_image_bytes
+
+    # 세션마다 다른 사진 (sha1 캐시/저장소 공유로 결과가 좋아 보이지 않게)
+    return [[(f"s{s + 1:02d}_{i + 1:02d}.jpg", synth_image_bytes(w, h, "jpg", "RGB", s * 1000 + i)) for i in range(images)] for s in range(sessions)]
+
+
+async def run_all(port: int, files, ramp: float, timeout: float):
+    sessions = [Session(port, i, timeout) for i in range(len(files))]
+
+    async def _one(s, fs, delay):
+        await asyncio.sleep(delay)
+        await s.run(fs)
+
+    await asyncio.gather(*[_one(s, fs, i * ramp) for i, (s, fs) in enumerate(zip(sessions, files))])
+    return sessions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="동시 세션 부하 테스트 (login → upload → reorder → generate → download)")
+    ap.add_argument("--sessions", type=int, default=5, help="동시 세션 수")
+    ap.add_argument("--images", type=int, default=8, help="세션당 업로드 이미지 수 (최대 MAX_TOTAL_IMAGES)")
+    ap.add_argument("--src-w", type=int, default=1200)
+    ap.add_argument("--src-h", type=int, default=1600)
+    ap.add_argument("--ramp", type=float, default=0.0, help="세션 시작 간격(초)")
+    ap.add_argument("--timeout", type=float, default=600.0, help="단계별 최대 대기(초)")
+    ap.add_argument("--keep", action="store_true", help="임시 폴더(서버 로그/트레이스) 남기기")
+    args = ap.parse_args()
+
+    files = make_files(args.sessions, args.images, args.src_w, args.src_h)
+    workdir = tempfile.mkdtemp(prefix="misharp_load_")
+    port = _free_port()
+    proc = start_server(workdir, port)
+    try:
+        with RssSampler(proc.pid) as rss:
+            idle_kb = sum(_status_kb(p, "VmRSS") for p in _proc_tree(proc.pid))
+            t0 = time.perf_counter()
+            sessions = asyncio.run(run_all(port, files, args.ramp, args.timeout))
+            wall = time.perf_counter() - t0
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    ok = [s for s in sessions if not s.errors and len(s.timings) == len(STEPS)]
+    print(f"\n=== Load test · {args.sessions}세션 × {args.images}장 ({args.src_w}×{args.src_h}) · CPU {os.cpu_count()} ===")
+    print(f"{'step':<10}{'n':>4}{'p50(ms)':>11}{'p95(ms)':>11}{'max(ms)':>11}")
+    for step in STEPS:
+        samples = [s.timings[step] for s in sessions if step in s.timings]
+        if samples:
+            p50, p95, _, mx = pct_stats(samples)
+            print(f"{step:<10}{len(samples):>4}{p50:>11,.0f}{p95:>11,.0f}{mx:>11,.0f}")
+    print(f"\n완료 세션 {len(ok)}/{len(sessions)} · 전체 {wall:,.1f}초 · 처리량 {len(ok) / wall * 60.0:,.1f} 세션/분")
+    print(f"서버 RSS: 대기 {idle_kb / 1024:,.0f}MB → 최대 {rss.peak_kb / 1024:,.0f}MB (VmHWM 합계 {rss.hwm_kb / 1024:,.0f}MB)")
+    for s in sessions:
+        for e in s.errors:
+            print(f"  [세션 {s.idx + 1}] {e}")
+    if args.keep:
+        print("임시 폴더:", workdir)
+
+
+if __name__ == "__main__":
+    main()
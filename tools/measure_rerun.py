@@ -0,0 +1,256 @@
+"""
+재실행(rerun) / 콜드 스타트 비용 측정 도구
+
+사용:
+  python tools/measure_rerun.py               # 기본 20회 반복
+  python tools/measure_rerun.py --runs 50 --items 20
+  python tools/measure_rerun.py --no-server              # 실제 서버 측정(목록 클릭) 생략
+
+측정 항목:
+- cold start: 새 프로세스에서 첫 스크립트 실행(import 포함)까지 걸린 시간 + 로그인 화면에서 PIL 로드 여부
+- login rerun: 로그인 화면(인증 ON, secrets 스텁) 재실행 1회당 스크립트 시간
+- main rerun: 메인 화면(인증 OFF) 재실행 1회당 스크립트 시간 (--items 장 목록 포함)
+- list click: 실제 서버(tools/load_test.py와 같은 headless 클라이언트)에서 --items 장 목록의 ▼ 클릭 1회
+  왕복 시간 → 목록 fragment만 재실행(브라우저와 같음) vs 같은 클릭을 전체 재실행으로 보냈을 때
+  (AppTest는 fragment 단독 재실행을 못 하므로 실제 서버 사용)
+- upload → add: 실제 서버에서 --items 장 업로드 후 --think 초 뒤 "목록에 추가" 클릭까지
+  업로드 재실행 / 추가 클릭 시간 → prefetch 켬(기본) vs 끔(MISHARP_PREFETCH_WORKERS=0)
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+from load_test import pct_stats  # noqa: E402
+
+# 측정용 더미 코드 (실제 코드 아님)
+STUB_ENTRIES = ["bench|staff||" + "0" * 64]
+
+_COLD_SNIPPET = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.secrets["AUTH_ENABLED"] = True
+at.secrets["ACCESS_CODE_ENTRIES"] = sys.argv[2:]
+at.run()
+t1 = time.perf_counter()
+print(json.dumps({"cold_ms": (t1 - t0) * 1000.0, "pil_loaded": "PIL" in sys.modules}))
+"""
+
+
+def measure_cold_start() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _COLD_SNIPPET, APP_PATH, *STUB_ENTRIES],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _timed_runs(at, runs: int):
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - t) * 1000.0)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return samples
+
+
+def measure_login_rerun(runs: int):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.secrets["AUTH_ENABLED"] = True
+    at.secrets["ACCESS_CODE_ENTRIES"] = STUB_ENTRIES
+    at.run()
+    return _timed_runs(at, runs)
+
+
+def measure_main_rerun(runs: int, n_items: int):
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, ROOT)
+    import app
+    from PIL import Image
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.run()
+    items = []
+    for i in range(n_items):
+        im = Image.new("RGB", (1200, 1600), ((i * 37) % 256, 120, 160))
+        items.append(app.ImgItem(name=f"img_{i + 1}.jpg", bytes_data=b"", pil=im, ext="jpg", sha1=f"bench{i}"))
+    at.session_state[app.STATE_ITEMS] = items
+    at.run()
+    return _timed_runs(at, runs)
+
+
+class _Server:
+    """load_test.start_server로 임시 폴더에 서버 1개 (with 블록이 끝나면 종료/정리)"""
+
+    def __init__(self, env: Optional[dict] = None):
+        self.env = env or {}
+
+    def __enter__(self):
+        import tempfile
+
+        import load_test
+
+        self.workdir = tempfile.mkdtemp(prefix="misharp_rerun_")
+        self.port = load_test._free_port()
+        saved = {k: os.environ.get(k) for k in self.env}
+        os.environ.update(self.env)
+        try:
+            self.proc = load_test.start_server(self.workdir, self.port)
+        finally:
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+        return self
+
+    def __exit__(self, *exc):
+        import shutil
+
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+async def _timed_click(sess, key: str, as_fragment: bool) -> float:
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    wid, _, frag = sess.find("button", key=key)
+    if as_fragment and not frag:
+        raise RuntimeError(f"{key} 버튼이 fragment 안에 없음")
+    t = time.perf_counter()
+    await sess.rerun([WidgetState(id=wid, trigger_value=True)], fragment_id=frag if as_fragment else "")
+    return (time.perf_counter() - t) * 1000.0
+
+
+def measure_list_click(runs: int, n_items: int):
+    """
+    목록 ▼(down_0) 클릭 1회 왕복 시간 → (fragment 재실행 샘플, 전체 재실행 샘플)
+    같은 세션에서 번갈아 측정 (캐시 상태를 같게)
+    """
+    import load_test
+
+    files = load_test.make_files(1, n_items, 1200, 1600)[0]
+
+    async def _run(port: int):
+        sess = load_test.Session(port, 0, timeout=600.0)
+        try:
+            await sess.open()
+            await sess.login()
+            await sess.upload(files)
+            await sess.add()
+            frag, full = [], []
+            for _ in range(runs):
+                frag.append(await _timed_click(sess, "down_0", True))
+                full.append(await _timed_click(sess, "down_0", False))
+            if sess.errors:
+                raise RuntimeError(sess.errors[0])
+            return frag, full
+        finally:
+            if sess.ws is not None:
+                sess.ws.close()
+
+    with _Server() as srv:
+        return asyncio.run(_run(srv.port))
+
+
+def measure_upload_add(runs: int, n_items: int, think: float, prefetch: bool):
+    """
+    세션마다 새 사진으로 upload → (think초) → add → [(업로드 재실행 ms, 추가 클릭 ms), ...]
+    추가 클릭 시간 = 사용자가 "목록에 추가"를 누른 뒤 목록이 뜰 때까지 (체감 지연)
+    """
+    import load_test
+
+    files = load_test.make_files(runs, n_items, 1200, 1600)
+
+    async def _one(port: int, fs):
+        sess = load_test.Session(port, 0, timeout=600.0)
+        try:
+            await sess.open()
+            await sess.login()
+            t = time.perf_counter()
+            await sess.upload(fs)
+            t_up = (time.perf_counter() - t) * 1000.0
+            await asyncio.sleep(think)
+            t = time.perf_counter()
+            await sess.add()
+            t_add = (time.perf_counter() - t) * 1000.0
+            if sess.errors:
+                raise RuntimeError(sess.errors[0])
+            return t_up, t_add
+        finally:
+            if sess.ws is not None:
+                sess.ws.close()
+
+    async def _run(port: int):
+        return [await _one(port, fs) for fs in files]
+
+    env = {} if prefetch else {"MISHARP_PREFETCH_WORKERS": "0"}
+    with _Server(env) as srv:
+        return asyncio.run(_run(srv.port))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Streamlit 재실행/콜드 스타트 비용 측정")
+    ap.add_argument("--runs", type=int, default=20, help="화면별 반복 횟수")
+    ap.add_argument("--items", type=int, default=20, help="메인 화면 측정 시 목록 이미지 수")
+    ap.add_argument("--no-server", action="store_true", help="실제 서버 측정 생략")
+    ap.add_argument("--upload-runs", type=int, default=3, help="upload → add 측정 세션 수 (prefetch 켬/끔 각각)")
+    ap.add_argument("--think", type=float, default=1.0, help="업로드 후 추가 클릭까지 대기(초)")
+    args = ap.parse_args()
+
+    cold = measure_cold_start()
+    login = pct_stats(measure_login_rerun(args.runs))
+    main_page = pct_stats(measure_main_rerun(args.runs, args.items))
+
+    print("\n=== Rerun / Startup Budget ===")
+    print(f"cold start (첫 실행, 로그인 화면) : {cold['cold_ms']:8.1f} ms   PIL 로드: {'예' if cold['pil_loaded'] else '아니오'}")
+    print(f"{'화면':<24}{'p50(ms)':>10}{'p95(ms)':>10}{'min(ms)':>10}")
+    print(f"{'login rerun':<24}{login[0]:>10.1f}{login[1]:>10.1f}{login[2]:>10.1f}")
+    print(f"{f'main rerun ({args.items}장)':<24}{main_page[0]:>10.1f}{main_page[1]:>10.1f}{main_page[2]:>10.1f}")
+
+    if args.no_server:
+        return
+    frag, full = measure_list_click(args.runs, args.items)
+    frag_s, full_s = pct_stats(frag), pct_stats(full)
+    print(f"\n=== 목록 클릭 (실제 서버, {args.items}장, ▼ 1회 왕복) ===")
+    print(f"{'방식':<24}{'p50(ms)':>10}{'p95(ms)':>10}{'min(ms)':>10}")
+    print(f"{'fragment rerun':<24}{frag_s[0]:>10.1f}{frag_s[1]:>10.1f}{frag_s[2]:>10.1f}")
+    print(f"{'full rerun':<24}{full_s[0]:>10.1f}{full_s[1]:>10.1f}{full_s[2]:>10.1f}")
+    print(f"→ fragment / full = {frag_s[0] / full_s[0]:.2f}x (p50)")
+
+    print(f"\n=== upload → add (실제 서버, {args.items}장, 추가 전 {args.think:.1f}초 대기, 세션 {args.upload_runs}개) ===")
+    print(f"{'prefetch':<12}{'upload p50':>12}{'add p50':>12}{'add max':>12}{'합계 p50':>12}")
+    for on in (True, False):
+        res = measure_upload_add(args.upload_runs, args.items, args.think, on)
+        ups = [u for u, _ in res]
+        adds = [a for _, a in res]
+        tot = [u + a for u, a in res]
+        label = "켬" if on else "끔"
+        print(f"{label:<12}{statistics.median(ups):>12.0f}{statistics.median(adds):>12.0f}{max(adds):>12.0f}{statistics.median(tot):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
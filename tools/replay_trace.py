@@ -0,0 +1,122 @@
+"""
+빌드 트레이스 재현(replay) / 벤치마크 도구
+
+운영에서 쌓인 build_trace.jsonl(이미지 내용 없음)을 읽어
+(트레이스는 기본 꺼짐 → 서버를 MISHARP_TRACE_LOG=build_trace.jsonl 로 실행해야 기록됨)
+같은 크기/포맷/모드의 합성 이미지를 만들고 _build_outputs를 다시 실행한다.
+→ 실제 작업 형태를 그대로 반복 가능한 벤치마크로 사용
+
+사용:
+  python tools/replay_trace.py build_trace.jsonl              # 전체 레코드
+  python tools/replay_trace.py build_trace.jsonl --last 5     # 마지막 5개만
+  python tools/replay_trace.py build_trace.jsonl --repeat 3   # 레코드당 3회 반복(최솟값 사용)
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app  # noqa: E402
+from synth_images import synth_image_bytes  # noqa: E402
+
+# 재현용 합성 이미지가 에셋 저장소에 쌓이지 않도록
+app.ASSET_STORE_DIR = ""
+
+STAGES = ["resize", "compose", "encode_long", "widths", "encode_parts", "zip", "total"]
+
+
+def load_traces(path: str):
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+    return rows
+
+
+def build_items(record: dict):
+    items = []
+    for i, spec in enumerate(record.get("items", [])):
+        ext = spec.get("ext", "jpg")
+        raw = synth_image_bytes(int(spec["w"]), int(spec["h"]), ext, spec.get("mode", "RGB"), i)
+        pil = app._open_image_any(raw)
+        items.append(
+            app.ImgItem(
+                name=f"replay_{i + 1:02d}.{ext}",
+                bytes_data=raw,
+                pil=pil,
+                ext=ext,
+                sha1=app._sha1(raw),
+                jpeg_passthrough=app._is_passthrough_jpeg(pil),
+            )
+        )
+    return items
+
+
+def replay(record: dict, repeat: int = 1) -> dict:
+    layout = record.get("layout", {})
+    profiles = record.get("jpeg_profiles", {})
+    items = build_items(record)
+    best = None
+    for _ in range(max(1, repeat)):
+        _, _, meta = app._build_outputs(
+            "replay",
+            int(layout.get("top", app.DEFAULT_TOP_PAD)),
+            int(layout.get("bottom", app.DEFAULT_BOTTOM_PAD)),
+            int(layout.get("gap", app.DEFAULT_GAP)),
+            items=items,
+            trace_path=None,
+            long_profile=profiles.get("long", app.DEFAULT_LONG_PROFILE),
+            parts_profile=profiles.get("parts", app.DEFAULT_PARTS_PROFILE),
+            strip_encode=bool(record.get("strip_encode")),
+            widths=record.get("widths"),
+            render_backend=record.get("render_backend"),
+        )
+        tm = meta["timings_ms"]
+        if best is None or tm["total"] < best["total"]:
+            best = tm
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="build_trace.jsonl 재현 벤치마크")
+    ap.add_argument("trace", nargs="?", default=app.TRACE_LOG_PATH or "build_trace.jsonl")
+    ap.add_argument("--last", type=int, default=0, help="마지막 N개 레코드만 (0=전체)")
+    ap.add_argument("--repeat", type=int, default=1, help="레코드당 반복 횟수 (최솟값 사용)")
+    args = ap.parse_args()
+
+    records = load_traces(args.trace)
+    if args.last > 0:
+        records = records[-args.last:]
+    if not records:
+        print("재현할 트레이스가 없습니다:", args.trace)
+        return
+
+    print(f"\n=== Replay: {args.trace} ({len(records)}건) ===")
+    print(f"{'#':>3} {'imgs':>5} {'height':>8} | " + " ".join(f"{s:>12}" for s in STAGES) + "   (replay ms / recorded ms)")
+    totals_rec, totals_rep = 0.0, 0.0
+    for idx, rec in enumerate(records, start=1):
+        got = replay(rec, args.repeat)
+        was = rec.get("timings_ms", {})
+        cells = []
+        for s in STAGES:
+            w = was.get(s)
+            cells.append(f"{got.get(s, 0):>6.0f}/{w:>5.0f}" if w is not None else f"{got.get(s, 0):>6.0f}/    -")
+        print(f"{idx:>3} {len(rec.get('items', [])):>5} {rec.get('out', {}).get('total_height', 0):>8} | " + " ".join(f"{c:>12}" for c in cells))
+        totals_rep += got.get("total", 0.0)
+        totals_rec += float(was.get("total", 0.0))
+
+    print(f"\n합계 total: replay {totals_rep:,.0f} ms / recorded {totals_rec:,.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+벤치마크/부하 테스트용 합성 이미지 (app을 import하지 않음 → streamlit 캐시 초기화/경고 없이 사용)
+
+사용:
+  from synth_images import synth_image_bytes
+  raw = synth_image_bytes(1200, 1600, "jpg", "RGB", seed=0)
+"""
+import io
+
+EXT_TO_FORMAT = {"jpg": "JPEG", "jpeg": "JPEG", "png": "PNG", "gif": "GIF", "webp": "WEBP"}
+
+
+def synth_image_bytes(w: int, h: int, ext: str, mode: str, seed: int) -> bytes:
+    """
+    사진과 비슷하게 압축되도록 그라데이션 + 노이즈를 섞은 합성 이미지.
+    (원본 내용은 없으므로 바이트 크기는 근사치)
+    """
+    from PIL import Image
+
+    grad = Image.linear_gradient("L").resize((w, h))
+    noise = Image.effect_noise((w, h), 24 + (seed % 16))
+    r = Image.blend(grad, noise, 0.35)
+    g = Image.blend(grad.transpose(Image.Transpose.FLIP_TOP_BOTTOM), noise, 0.25)
+    b = noise
+    im = Image.merge("RGB", (r, g, b))
+    if mode == "RGBA":
+        im = im.convert("RGBA")
+
+    fmt = EXT_TO_FORMAT.get((ext or "").lower(), "JPEG")
+    if fmt == "JPEG" and im.mode != "RGB":
+        im = im.convert("RGB")
+    if fmt == "GIF":
+        im = im.convert("P")
+    out = io.BytesIO()
+    im.save(out, format=fmt, **({"quality": 90} if fmt in ("JPEG", "WEBP") else {}))
+    return out.getvalue()
@@ -0,0 +1,87 @@
+"""
+상품별 폴더 ZIP 구성 확인 도구
+
+배치 모드에 올리기 전에 ZIP이 어떤 상품/파일로 나뉘는지 미리 본다 (app._extract_zip_products 그대로 사용).
+--check 는 대표적인 폴더 구조(중첩 하위 폴더, 감싸는 폴더, 루트 이미지)로 상품 분리 규칙을 확인한다.
+
+사용:
+  python tools/zip_products.py supplier.zip       # 상품별 파일 목록
+  python tools/zip_products.py --check            # 폴더 구조별 분리 규칙 확인 (틀리면 종료 코드 1)
+"""
+import argparse
+import io
+import os
+import sys
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+
+# (ZIP 안 경로들, 기대 결과 [(상품명, [파일명, ...]), ...])
+LAYOUTS = [
+    # 상품 폴더 안 같은 이름의 하위 폴더 → 하위 폴더명이 아니라 상품 폴더로 묶임
+    (
+        ["A/detail/01.jpg", "B/detail/01.jpg", "B/detail/02.jpg", "C/01.jpg"],
+        [("A", ["01.jpg"]), ("B", ["01.jpg", "02.jpg"]), ("C", ["01.jpg"])],
+    ),
+    # 감싸는 폴더는 걷어냄, 상품 폴더 안 하위 폴더는 같은 상품
+    (
+        ["wrap/A/01.jpg", "wrap/B/02.jpg", "wrap/B/sub/01.jpg"],
+        [("A", ["01.jpg"]), ("B", ["02.jpg", "01.jpg"])],
+    ),
+    # 상품 1개
+    (["A/02.jpg", "A/01.jpg"], [("A", ["01.jpg", "02.jpg"])]),
+    (["wrap/A/01.jpg"], [("A", ["01.jpg"])]),
+    # 루트 이미지는 "product"
+    (["r.jpg", "A/01.jpg"], [("A", ["01.jpg"]), ("product", ["r.jpg"])]),
+]
+
+
+def _plan(zip_bytes: bytes):
+    return [(product, [name for name, _ in files]) for product, files in app._extract_zip_products(zip_bytes)]
+
+
+def _zip_of(paths) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for p in paths:
+            zf.writestr(p, b"")
+    return buf.getvalue()
+
+
+def check() -> int:
+    failed = 0
+    for paths, expected in LAYOUTS:
+        got = _plan(_zip_of(paths))
+        ok = got == expected
+        failed += not ok
+        print(f"{'OK ' if ok else 'FAIL'} {paths}")
+        if not ok:
+            print(f"     기대: {expected}\n     결과: {got}")
+    return 1 if failed else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="상품별 폴더 ZIP 구성 확인")
+    ap.add_argument("zip", nargs="?", help="확인할 ZIP 파일")
+    ap.add_argument("--check", action="store_true", help="폴더 구조별 상품 분리 규칙 확인")
+    args = ap.parse_args()
+
+    if args.check:
+        sys.exit(check())
+    if not args.zip:
+        ap.error("ZIP 경로 또는 --check 를 지정하세요.")
+
+    with open(args.zip, "rb") as f:
+        plan = _plan(f.read())
+    for product, names in plan:
+        print(f"{product}  ({len(names)}장)")
+        for name in names:
+            print(f"  {name}")
+    print(f"→ 상품 {len(plan)}개")
+
+
+if __name__ == "__main__":
+    main()